@@ -1,51 +1,139 @@
+import logging
+import os
+import time
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CoreState, HomeAssistant, callback
 from homeassistant.helpers.typing import ConfigType
-from homeassistant.const import Platform
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 
 from .const import (
     DOMAIN,
-    CONF_SWITCH, CONF_POWER, CONF_HUMIDITY,
+    CONF_SWITCH, CONF_POWER, CONF_HUMIDITY, CONF_EXTRA_HUMIDITY, CONF_PRICE_SENSOR,
     CONF_FULL_THRESHOLD, CONF_HUMIDITY_ON, CONF_HUMIDITY_OFF,
     CONF_START_TIME, CONF_END_TIME,
     CONF_NAME,
+    DATA_FLEET, FLEET_STORAGE_KEY,
+    TRANSLOG_DIRECTORY, TRANSLOG_MAX_BYTES, TRANSLOG_FILES,
 )
+from .circuit import CircuitScheduler
 from .coordinator import DehumidifierCoordinator
+from .entity_index import EntityIndex, SOURCE_ROLES
+from .fleet import DehumidifierFleet
 from .models import DehumidifierConfig
+from .restore import RestoreCache, entry_storage
+from .services import async_setup_services
+from .status import FleetStatus
+from .translog import TransitionLog
+from .utils import slugify
+from .websocket_api import async_setup_websocket
+
+_LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.SWITCH]
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Initialize the integration (not used for YAML setup)."""
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    # Read the saved state of all entries in one go while the entries are being set up
+    RestoreCache.async_get(hass).async_preload()
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the integration from a config entry."""
+    started = time.perf_counter()
 
-    # Merge config entry data and options
-    data = {
-        **entry.data,
-        **entry.options,
-        CONF_NAME: entry.title,  # Use the title as internal name
-    }
+    data = _entry_settings(entry)
 
     config = DehumidifierConfig.from_dict(data)
-    coordinator = DehumidifierCoordinator(hass, config)
+    index = EntityIndex.async_get(hass)
+    entities = index.async_resolve(entry.entry_id, config)
+    entry.async_on_unload(lambda: index.async_release(entry.entry_id))
+
+    @callback
+    def _async_source_renamed(role, old_entity_id, new_entity_id):
+        # Keep the entry pointing at the renamed entity after a restart. The coordinator
+        # already follows the rename, so the settings it runs with are updated first
+        # and update_listener sees nothing to reload
+        if role in SOURCE_ROLES and new_entity_id and entry.data.get(role) != new_entity_id:
+            data[role] = new_entity_id
+            hass.config_entries.async_update_entry(entry, data={**entry.data, role: new_entity_id})
+        elif role == CONF_EXTRA_HUMIDITY and new_entity_id:
+            # The list is in the options once they have been saved, else still in the data
+            key = "options" if CONF_EXTRA_HUMIDITY in entry.options else "data"
+            current = getattr(entry, key)
+            sensors = [new_entity_id if sensor == old_entity_id else sensor for sensor in current.get(role, [])]
+            data[role] = sensors
+            hass.config_entries.async_update_entry(entry, **{key: {**current, role: sensors}})
+        elif role == CONF_PRICE_SENSOR and new_entity_id:
+            key = "options" if CONF_PRICE_SENSOR in entry.options else "data"
+            current = getattr(entry, key)
+            data[role] = new_entity_id
+            hass.config_entries.async_update_entry(entry, **{key: {**current, role: new_entity_id}})
+
+    entry.async_on_unload(entities.async_add_listener(_async_source_renamed))
+
+    storage = entry_storage(hass, entry)
+    coordinator = DehumidifierCoordinator(hass, config, entities, storage)
+    if config.circuit:
+        # Join before the first evaluation so starts after a restart are staggered too
+        circuit = CircuitScheduler.async_get(hass, config.circuit)
+        circuit.async_add_member(coordinator, config.circuit_budget)
+        coordinator.circuit = circuit
+        entry.async_on_unload(lambda: circuit.async_remove_member(coordinator))
+    # Saved state (full latch, manual override, energy totals) must be in place before the first evaluation
+    coordinator.async_restore(await RestoreCache.async_load(hass, entry.entry_id, storage))
+
+    async def _async_final_write(_event):
+        await coordinator.async_flush_log()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_FINAL_WRITE, _async_final_write))
+
+    @callback
+    def _async_stop(_event):
+        # Queued now, the write goes out with the store's final write
+        coordinator.async_schedule_save(flush_energy=True)
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop))
+
     await coordinator.async_config_entry_first_refresh()
 
+    @callback
+    def _async_start_control(_hass: HomeAssistant | None = None):
+        if config.fleet_mode:
+            DehumidifierFleet.async_get(hass).async_add_member(entry.entry_id, coordinator)
+        coordinator.async_start_event_tracking()
+        # The summary attributes can wait: count the logged transitions with the first batched write
+        coordinator.async_schedule_log_flush()
+
+    if hass.state is CoreState.running:
+        _async_start_control()
+    else:
+        # State change tracking, fleet batching and the log summary wait until startup has finished
+        entry.async_on_unload(async_at_started(hass, _async_start_control))
+    entry.async_on_unload(coordinator.async_stop_event_tracking)
+    entry.async_on_unload(coordinator.actuator.async_shutdown)
+
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
 
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
+        "settings": data,
     }
+    entry.async_on_unload(FleetStatus.async_get(hass).async_add_member(entry.entry_id, coordinator))
 
     # Reload entry automatically if options are updated
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    coordinator.metrics.setup_duration = (time.perf_counter() - started) * 1000
+    _LOGGER.debug(f"{entry.title} - Set up in {coordinator.metrics.setup_duration:.1f} ms")
     return True
 
 
@@ -53,11 +141,44 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload the config entry and its platforms."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)["coordinator"]
+        # Flush any change still waiting for its delayed write
+        await coordinator.save_persistent_data()
+        await coordinator.async_flush_log()
+        if fleet := hass.data[DOMAIN].get(DATA_FLEET):
+            await fleet.async_remove_member(entry.entry_id)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the persisted state of a removed dehumidifier."""
+    fleet = hass.data.get(DOMAIN, {}).get(DATA_FLEET)
+    if fleet is None and await hass.async_add_executor_job(
+        os.path.exists, hass.config.path(STORAGE_DIR, FLEET_STORAGE_KEY)
+    ):
+        # No fleet member is running, but the entry may have been one before
+        fleet = DehumidifierFleet(hass)
+    if fleet is not None:
+        await fleet.async_remove_record(entry.entry_id)
+    await Store(hass, 1, f"{DOMAIN}_{slugify(entry.title)}").async_remove()
+    log = TransitionLog(hass.config.path(STORAGE_DIR, TRANSLOG_DIRECTORY), slugify(entry.title), TRANSLOG_MAX_BYTES, TRANSLOG_FILES)
+    await hass.async_add_executor_job(log.remove)
+
+
+def _entry_settings(entry: ConfigEntry) -> dict:
+    """Config entry data and options merged, as the entry is set up with."""
+    return {
+        **entry.data,
+        **entry.options,
+        CONF_NAME: entry.title,  # Use the title as internal name
+    }
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Trigger reload when options are changed."""
+    record = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if record is not None and record["settings"] == _entry_settings(entry):
+        # Only followed entity renames changed, and the coordinator already uses the new ids
+        return
     await hass.config_entries.async_reload(entry.entry_id)
 
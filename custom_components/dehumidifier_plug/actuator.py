@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, Event, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import (
+    ACTUATOR_TIMEOUT,
+    ACTUATOR_MAX_ATTEMPTS,
+    ACTUATOR_BACKOFF,
+)
+from .metrics import Histogram
+
+_LOGGER = logging.getLogger(__name__)
+
+_TARGET_STATE = {"turn_on": "on", "turn_off": "off"}
+
+
+class SwitchActuator:
+    """Sends switch commands for one plug without blocking the control loop.
+
+    At most one command is in flight. A request identical to the one in flight,
+    or for the state the plug already reports, is dropped; a different request
+    supersedes the one in flight. Each attempt waits for the plug to report the
+    target state, bounded by a timeout, and is retried with exponential backoff.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_id: str, name: str):
+        self.hass = hass
+        self.entity_id = entity_id
+        self.name = name
+        self.in_flight = None
+        self._task = None
+        self._confirmed = None
+        self.commands_sent = 0
+        self.commands_deduplicated = 0
+        self.commands_failed = 0
+        self.retries = 0
+        self.last_latency = None
+        self.latency = Histogram()
+
+    @callback
+    def async_request(self, action: str):
+        """Queue a turn_on/turn_off command; returns immediately."""
+        if action == self.in_flight:
+            self.commands_deduplicated += 1
+            return
+        if self.in_flight is None:
+            state = self.hass.states.get(self.entity_id)
+            if state and state.state == _TARGET_STATE[action]:
+                self.commands_deduplicated += 1
+                return
+        if self._task:
+            self._task.cancel()
+        self.in_flight = action
+        self._task = self.hass.async_create_task(self._async_run(action))
+
+    @callback
+    def async_pop_confirmed(self):
+        """Return the action confirmed since the last call, if any."""
+        confirmed, self._confirmed = self._confirmed, None
+        return confirmed
+
+    @callback
+    def async_shutdown(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.in_flight = None
+
+    async def _async_run(self, action: str):
+        target = _TARGET_STATE[action]
+        confirmed = asyncio.Event()
+
+        @callback
+        def _state_changed(event: Event):
+            new_state = event.data.get("new_state")
+            if new_state and new_state.state == target:
+                confirmed.set()
+
+        unsub = async_track_state_change_event(self.hass, [self.entity_id], _state_changed)
+        try:
+            for attempt in range(ACTUATOR_MAX_ATTEMPTS):
+                if attempt:
+                    self.retries += 1
+                    await asyncio.sleep(ACTUATOR_BACKOFF * 2 ** (attempt - 1))
+                sent_at = time.monotonic()
+                self.commands_sent += 1
+                try:
+                    async with asyncio.timeout(ACTUATOR_TIMEOUT):
+                        await self.hass.services.async_call("switch", action, {"entity_id": self.entity_id}, blocking=True)
+                        state = self.hass.states.get(self.entity_id)
+                        if not state or state.state != target:
+                            await confirmed.wait()
+                except (TimeoutError, HomeAssistantError) as err:
+                    _LOGGER.warning(
+                        f"{self.name} - {action} attempt {attempt + 1}/{ACTUATOR_MAX_ATTEMPTS} "
+                        f"for {self.entity_id} failed: {str(err) or 'no confirmation'}"
+                    )
+                    continue
+                self.last_latency = time.monotonic() - sent_at
+                self.latency.record(self.last_latency * 1000)
+                self._confirmed = action
+                return
+            self.commands_failed += 1
+            _LOGGER.error(f"{self.name} - Giving up on {action} for {self.entity_id} after {ACTUATOR_MAX_ATTEMPTS} attempts")
+        finally:
+            unsub()
+            if self.in_flight == action and self._task is asyncio.current_task():
+                self.in_flight = None
+                self._task = None
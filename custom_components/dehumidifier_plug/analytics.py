@@ -0,0 +1,110 @@
+"""Rolling statistics over recent power readings, used for tank-full detection.
+
+Times are UTC epoch seconds.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from math import exp
+
+STATISTIC_SAMPLE = "sample"
+STATISTIC_MEDIAN = "median"
+STATISTIC_EWMA = "ewma"
+STATISTICS = (STATISTIC_SAMPLE, STATISTIC_MEDIAN, STATISTIC_EWMA)
+
+
+class PowerStats:
+    """Fixed-size ring buffer of power samples with incrementally kept statistics.
+
+    Memory is fixed by size however often samples arrive. Each sample updates the
+    rolling median (a sorted copy of the window, at most size entries to shift),
+    a time-weighted EWMA and the time the selected statistic went below the
+    threshold, so reading any of them is O(1).
+    """
+
+    __slots__ = (
+        "size",
+        "threshold",
+        "statistic",
+        "time_constant",
+        "_values",
+        "_sorted",
+        "_next",
+        "count",
+        "last",
+        "last_time",
+        "ewma",
+        "below_since",
+    )
+
+    def __init__(self, size: int, threshold: float, statistic: str = STATISTIC_SAMPLE, time_constant: float = 30.0):
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown power statistic '{statistic}'")
+        self.size = size
+        self.threshold = threshold
+        self.statistic = statistic
+        self.time_constant = time_constant
+        self._values = array("d", bytes(8 * size))
+        self._sorted = array("d")
+        self.reset()
+
+    def reset(self):
+        """Forget all samples, e.g. when the plug is switched off."""
+        self._sorted = array("d")
+        self._next = 0
+        self.count = 0
+        self.last = None
+        self.last_time = None
+        self.ewma = None
+        self.below_since = None
+
+    def add(self, timestamp: float, value: float):
+        """Record one reading; one no newer than the last is ignored, so the same reading can be offered twice."""
+        if self.last_time is not None and timestamp <= self.last_time:
+            return
+        if self.count == self.size:
+            # Window is full: the slot about to be overwritten leaves the median too
+            old = self._values[self._next]
+            del self._sorted[bisect_left(self._sorted, old)]
+        else:
+            self.count += 1
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.size
+        insort(self._sorted, value)
+
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            # Weight by elapsed time so the average does not depend on the reporting rate
+            alpha = 1 - exp(-max(timestamp - self.last_time, 0) / self.time_constant)
+            self.ewma += alpha * (value - self.ewma)
+        self.last = value
+        self.last_time = timestamp
+
+        if self.value < self.threshold:
+            if self.below_since is None:
+                self.below_since = timestamp
+        else:
+            self.below_since = None
+
+    @property
+    def median(self) -> float | None:
+        if not self.count:
+            return None
+        middle = self.count // 2
+        if self.count % 2:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2
+
+    @property
+    def value(self) -> float | None:
+        """The selected statistic."""
+        if self.statistic == STATISTIC_MEDIAN:
+            return self.median
+        if self.statistic == STATISTIC_EWMA:
+            return self.ewma
+        return self.last
+
+    def time_below(self, now: float) -> float:
+        """Seconds the selected statistic has been below the threshold, 0 if it is not."""
+        return now - self.below_since if self.below_since is not None else 0.0
@@ -0,0 +1,191 @@
+import heapq
+import itertools
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DOMAIN,
+    DATA_CIRCUITS,
+    CIRCUIT_STAGGER_INTERVAL,
+    CIRCUIT_RESERVATION_TIME,
+    CIRCUIT_DEFAULT_START_POWER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitScheduler:
+    """Admission control for the dehumidifiers sharing one electrical circuit.
+
+    A member that wants to switch on asks for admission. Starts are staggered by
+    CIRCUIT_STAGGER_INTERVAL, and each must fit in the circuit's power budget
+    next to what the other members measurably draw plus what the members
+    admitted recently are expected to draw until their power sensor shows it.
+    Members that have to wait are queued by how far their room is above its
+    start threshold; when a slot opens the most urgent one is admitted and its
+    coordinator is asked to evaluate again.
+    """
+
+    def __init__(self, hass: HomeAssistant, name: str):
+        self.hass = hass
+        self.name = name
+        self._budgets = {}
+        self._queue = []
+        self._waiting = {}
+        self._permits = {}
+        self._reserved = {}
+        self._sequence = itertools.count()
+        self._last_start = None
+        self._unsub_dispatch = None
+        self.starts = 0
+        self.deferred = 0
+
+    @staticmethod
+    @callback
+    def async_get(hass: HomeAssistant, name: str) -> "CircuitScheduler":
+        """Return the scheduler of the named circuit, creating it if needed."""
+        circuits = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CIRCUITS, {})
+        if name not in circuits:
+            circuits[name] = CircuitScheduler(hass, name)
+        return circuits[name]
+
+    @property
+    def budget(self) -> float:
+        """Smallest budget any member was configured with; 0 means only staggering."""
+        budgets = [budget for budget in self._budgets.values() if budget > 0]
+        return min(budgets) if budgets else 0.0
+
+    @callback
+    def async_add_member(self, coordinator, budget: float):
+        self._budgets[coordinator] = budget
+
+    @callback
+    def async_remove_member(self, coordinator):
+        self._budgets.pop(coordinator, None)
+        self._waiting.pop(coordinator, None)
+        self._permits.pop(coordinator, None)
+        self._reserved.pop(coordinator, None)
+        if self._budgets:
+            return
+        if self._unsub_dispatch:
+            self._unsub_dispatch()
+            self._unsub_dispatch = None
+        self.hass.data.get(DOMAIN, {}).get(DATA_CIRCUITS, {}).pop(self.name, None)
+
+    @callback
+    def async_admit(self, coordinator, priority: float) -> bool:
+        """Whether the member may switch on now; if not it is queued and refreshed once admitted."""
+        now = self.hass.loop.time()
+        if self._permits.pop(coordinator, None) is not None:
+            return True
+        if self._waiting.get(coordinator) != priority:
+            self._waiting[coordinator] = priority
+            heapq.heappush(self._queue, (-priority, next(self._sequence), coordinator))
+        self._async_dispatch(now, coordinator)
+        if self._permits.pop(coordinator, None) is not None:
+            return True
+        self.deferred += 1
+        return False
+
+    @callback
+    def async_withdraw(self, coordinator):
+        """The member no longer wants to switch on."""
+        self._waiting.pop(coordinator, None)
+        if self._permits.pop(coordinator, None) is not None:
+            # Admitted but never started: release what was set aside for it
+            self._reserved.pop(coordinator, None)
+
+    @callback
+    def async_release(self, coordinator):
+        """The member is switching off: what was set aside for its start is free again."""
+        if self._reserved.pop(coordinator, None) is not None and self._async_peek() is not None:
+            self._async_dispatch(self.hass.loop.time())
+
+    def used_power(self, now: float) -> float:
+        """Measured draw of the members, raised to the expected draw of recent starts."""
+        used = 0.0
+        for coordinator in self._budgets:
+            measured = coordinator.power or 0.0
+            reservation = self._reserved.get(coordinator)
+            if reservation is not None:
+                expected, until = reservation
+                if now < until and measured < expected:
+                    measured = expected
+                elif now >= until:
+                    del self._reserved[coordinator]
+            used += measured
+        return used
+
+    @callback
+    def _async_dispatch(self, now: float, caller=None):
+        """Admit the most urgent waiting member if the stagger interval and the budget allow it.
+
+        The admitted member is asked to evaluate again, unless it is the caller
+        which is evaluating right now.
+        """
+        # Permits not taken up within the reservation time lapse
+        for coordinator, granted in list(self._permits.items()):
+            if now - granted >= CIRCUIT_RESERVATION_TIME:
+                del self._permits[coordinator]
+
+        coordinator = self._async_peek()
+        if coordinator is None:
+            return
+        if self._last_start is not None and now < self._last_start + CIRCUIT_STAGGER_INTERVAL:
+            self._async_schedule_dispatch(self._last_start + CIRCUIT_STAGGER_INTERVAL - now)
+            return
+        expected = coordinator.running_power or CIRCUIT_DEFAULT_START_POWER
+        budget = self.budget
+        used = self.used_power(now)
+        # A unit starting on an idle circuit always gets through, whatever it is expected to draw
+        if budget and used > 0 and used + expected > budget:
+            # Look again once running members may have settled or switched off
+            self._async_schedule_dispatch(CIRCUIT_STAGGER_INTERVAL)
+            return
+
+        heapq.heappop(self._queue)
+        del self._waiting[coordinator]
+        self._permits[coordinator] = now
+        self._reserved[coordinator] = (expected, now + CIRCUIT_RESERVATION_TIME)
+        self._last_start = now
+        self.starts += 1
+        _LOGGER.debug(f"Circuit {self.name} - Admitted {coordinator.config.name} ({expected:.0f} W expected)")
+        if coordinator is not caller:
+            coordinator.async_circuit_admitted()
+        if self._async_peek() is not None:
+            self._async_schedule_dispatch(CIRCUIT_STAGGER_INTERVAL)
+
+    @callback
+    def _async_peek(self):
+        """Most urgent waiting member, discarding queue entries that are outdated."""
+        while self._queue:
+            priority, _, coordinator = self._queue[0]
+            if self._waiting.get(coordinator) == -priority:
+                return coordinator
+            heapq.heappop(self._queue)
+        return None
+
+    @callback
+    def _async_schedule_dispatch(self, delay: float):
+        if self._unsub_dispatch:
+            return
+        self._unsub_dispatch = async_call_later(self.hass, delay, self._async_dispatch_due)
+
+    @callback
+    def _async_dispatch_due(self, _now):
+        self._unsub_dispatch = None
+        self._async_dispatch(self.hass.loop.time())
+
+    def as_dict(self) -> dict:
+        now = self.hass.loop.time()
+        return {
+            "name": self.name,
+            "budget": self.budget,
+            "used_power": round(self.used_power(now), 1),
+            "members": len(self._budgets),
+            "waiting": sorted((coordinator.config.name for coordinator in self._waiting)),
+            "starts": self.starts,
+            "deferred_evaluations": self.deferred,
+        }
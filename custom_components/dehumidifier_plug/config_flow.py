@@ -6,10 +6,82 @@ from homeassistant.helpers import selector
 from .const import (
     DOMAIN, CONF_NAME, CONF_SWITCH, CONF_POWER, CONF_HUMIDITY,
     CONF_FULL_THRESHOLD, CONF_HUMIDITY_ON, CONF_HUMIDITY_OFF,
-    CONF_START_TIME, CONF_END_TIME,
+    CONF_START_TIME, CONF_END_TIME, CONF_EVENT_DRIVEN, CONF_FLEET_MODE, CONF_FLEET_STATUS_SENSOR, CONF_SCHEDULE,
+    CONF_FULL_DWELL, CONF_POWER_STATISTIC, CONF_MIN_REFRESH_INTERVAL, CONF_MAX_REFRESH_INTERVAL,
+    CONF_EXTRA_HUMIDITY, CONF_HUMIDITY_AGGREGATION, CONF_HUMIDITY_WEIGHTS, CONF_HUMIDITY_MAX_AGE,
+    CONF_CIRCUIT, CONF_CIRCUIT_BUDGET, CONF_MIN_ON_TIME, CONF_MIN_OFF_TIME,
+    CONF_PRICE_SENSOR, CONF_PRICE_RUNTIME, CONF_PRICE_BLOCK,
     DEFAULT_FULL_THRESHOLD, DEFAULT_HUMIDITY_ON, DEFAULT_HUMIDITY_OFF,
-    DEFAULT_START_TIME, DEFAULT_END_TIME,
+    DEFAULT_START_TIME, DEFAULT_END_TIME, DEFAULT_EVENT_DRIVEN, DEFAULT_FLEET_MODE, DEFAULT_FLEET_STATUS_SENSOR, DEFAULT_SCHEDULE,
+    DEFAULT_FULL_DWELL, DEFAULT_POWER_STATISTIC, DEFAULT_MIN_REFRESH_INTERVAL, DEFAULT_MAX_REFRESH_INTERVAL,
+    DEFAULT_EXTRA_HUMIDITY, DEFAULT_HUMIDITY_AGGREGATION, DEFAULT_HUMIDITY_WEIGHTS, DEFAULT_HUMIDITY_MAX_AGE,
+    DEFAULT_CIRCUIT, DEFAULT_CIRCUIT_BUDGET, DEFAULT_MIN_ON_TIME, DEFAULT_MIN_OFF_TIME,
+    DEFAULT_PRICE_RUNTIME, DEFAULT_PRICE_BLOCK,
 )
+from .analytics import STATISTICS
+from .humidity import AGGREGATIONS, parse_weights
+from .schedule import Schedule
+
+
+FULL_DWELL_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0, max=3600, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+)
+POWER_STATISTIC_SELECTOR = selector.SelectSelector(
+    selector.SelectSelectorConfig(options=list(STATISTICS), translation_key=CONF_POWER_STATISTIC)
+)
+
+MIN_REFRESH_INTERVAL_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=5, max=600, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+)
+MAX_REFRESH_INTERVAL_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=10, max=3600, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+)
+
+EXTRA_HUMIDITY_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="sensor", multiple=True)
+)
+HUMIDITY_AGGREGATION_SELECTOR = selector.SelectSelector(
+    selector.SelectSelectorConfig(options=list(AGGREGATIONS), translation_key=CONF_HUMIDITY_AGGREGATION)
+)
+HUMIDITY_MAX_AGE_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0, max=86400, step=60, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+)
+CIRCUIT_BUDGET_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0, max=100000, step=10, unit_of_measurement="W", mode=selector.NumberSelectorMode.BOX)
+)
+MIN_DWELL_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0, max=7200, step=30, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+)
+PRICE_SENSOR_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="sensor")
+)
+PRICE_RUNTIME_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0.25, max=24, step=0.25, unit_of_measurement="h", mode=selector.NumberSelectorMode.BOX)
+)
+PRICE_BLOCK_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=15, max=720, step=15, unit_of_measurement="min", mode=selector.NumberSelectorMode.BOX)
+)
+
+
+def _validate_schedule(user_input: dict) -> dict:
+    """Return form errors for a schedule that does not parse."""
+    try:
+        Schedule.parse(user_input.get(CONF_SCHEDULE) or "")
+    except ValueError:
+        return {CONF_SCHEDULE: "invalid_schedule"}
+    return {}
+
+
+def _validate_humidity_weights(user_input: dict, humidity_sensor: str) -> dict:
+    """Return form errors for weights that do not match the humidity sensors."""
+    # Counted like DehumidifierConfig.humidity_sensors: a sensor listed twice is read once
+    sensors = dict.fromkeys([humidity_sensor, *(user_input.get(CONF_EXTRA_HUMIDITY) or [])])
+    try:
+        parse_weights(user_input.get(CONF_HUMIDITY_WEIGHTS) or "", len(sensors))
+    except ValueError:
+        return {CONF_HUMIDITY_WEIGHTS: "invalid_weights"}
+    return {}
+
 
 class DehumidifierConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
@@ -20,11 +92,17 @@ class DehumidifierConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return DehumidifierOptionsFlowHandler(config_entry)
 
     async def async_step_user(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(
-                title=user_input[CONF_NAME],
-                data=user_input
-            )
+            errors = {
+                **_validate_schedule(user_input),
+                **_validate_humidity_weights(user_input, user_input[CONF_HUMIDITY]),
+            }
+            if not errors:
+                return self.async_create_entry(
+                    title=user_input[CONF_NAME],
+                    data=user_input
+                )
 
         # Display the setup form with default values and selectors
         return self.async_show_form(
@@ -51,7 +129,29 @@ class DehumidifierConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 ),
                 vol.Optional(CONF_START_TIME, default=DEFAULT_START_TIME): selector.TimeSelector(),
                 vol.Optional(CONF_END_TIME, default=DEFAULT_END_TIME): selector.TimeSelector(),
-            })
+                vol.Optional(CONF_EVENT_DRIVEN, default=DEFAULT_EVENT_DRIVEN): selector.BooleanSelector(),
+                vol.Optional(CONF_FLEET_MODE, default=DEFAULT_FLEET_MODE): selector.BooleanSelector(),
+                vol.Optional(CONF_FLEET_STATUS_SENSOR, default=DEFAULT_FLEET_STATUS_SENSOR): selector.BooleanSelector(),
+                vol.Optional(CONF_SCHEDULE, default=DEFAULT_SCHEDULE): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+                vol.Optional(CONF_FULL_DWELL, default=DEFAULT_FULL_DWELL): FULL_DWELL_SELECTOR,
+                vol.Optional(CONF_POWER_STATISTIC, default=DEFAULT_POWER_STATISTIC): POWER_STATISTIC_SELECTOR,
+                vol.Optional(CONF_MIN_REFRESH_INTERVAL, default=DEFAULT_MIN_REFRESH_INTERVAL): MIN_REFRESH_INTERVAL_SELECTOR,
+                vol.Optional(CONF_MAX_REFRESH_INTERVAL, default=DEFAULT_MAX_REFRESH_INTERVAL): MAX_REFRESH_INTERVAL_SELECTOR,
+                vol.Optional(CONF_EXTRA_HUMIDITY, default=DEFAULT_EXTRA_HUMIDITY): EXTRA_HUMIDITY_SELECTOR,
+                vol.Optional(CONF_HUMIDITY_AGGREGATION, default=DEFAULT_HUMIDITY_AGGREGATION): HUMIDITY_AGGREGATION_SELECTOR,
+                vol.Optional(CONF_HUMIDITY_WEIGHTS, default=DEFAULT_HUMIDITY_WEIGHTS): selector.TextSelector(),
+                vol.Optional(CONF_HUMIDITY_MAX_AGE, default=DEFAULT_HUMIDITY_MAX_AGE): HUMIDITY_MAX_AGE_SELECTOR,
+                vol.Optional(CONF_CIRCUIT, default=DEFAULT_CIRCUIT): selector.TextSelector(),
+                vol.Optional(CONF_CIRCUIT_BUDGET, default=DEFAULT_CIRCUIT_BUDGET): CIRCUIT_BUDGET_SELECTOR,
+                vol.Optional(CONF_MIN_ON_TIME, default=DEFAULT_MIN_ON_TIME): MIN_DWELL_SELECTOR,
+                vol.Optional(CONF_MIN_OFF_TIME, default=DEFAULT_MIN_OFF_TIME): MIN_DWELL_SELECTOR,
+                vol.Optional(CONF_PRICE_SENSOR): PRICE_SENSOR_SELECTOR,
+                vol.Optional(CONF_PRICE_RUNTIME, default=DEFAULT_PRICE_RUNTIME): PRICE_RUNTIME_SELECTOR,
+                vol.Optional(CONF_PRICE_BLOCK, default=DEFAULT_PRICE_BLOCK): PRICE_BLOCK_SELECTOR,
+            }),
+            errors=errors,
         )
 
 class DehumidifierOptionsFlowHandler(config_entries.OptionsFlow):
@@ -59,8 +159,17 @@ class DehumidifierOptionsFlowHandler(config_entries.OptionsFlow):
         self.config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            humidity_sensor = self.config_entry.options.get(CONF_HUMIDITY, self.config_entry.data.get(CONF_HUMIDITY))
+            errors = {
+                **_validate_schedule(user_input),
+                **_validate_humidity_weights(user_input, humidity_sensor),
+            }
+            if not errors:
+                # A cleared price sensor is left out of the input; record it so it overrides the setup data
+                user_input.setdefault(CONF_PRICE_SENSOR, "")
+                return self.async_create_entry(title="", data=user_input)
 
         # Display the options form for editing thresholds and time range
         return self.async_show_form(
@@ -86,6 +195,144 @@ class DehumidifierOptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_END_TIME,
                     default=self.config_entry.options.get(CONF_END_TIME, DEFAULT_END_TIME)
                 ): selector.TimeSelector(),
-            })
+                vol.Optional(
+                    CONF_EVENT_DRIVEN,
+                    default=self.config_entry.options.get(
+                        CONF_EVENT_DRIVEN,
+                        self.config_entry.data.get(CONF_EVENT_DRIVEN, DEFAULT_EVENT_DRIVEN),
+                    )
+                ): selector.BooleanSelector(),
+                vol.Optional(
+                    CONF_FLEET_MODE,
+                    default=self.config_entry.options.get(
+                        CONF_FLEET_MODE,
+                        self.config_entry.data.get(CONF_FLEET_MODE, DEFAULT_FLEET_MODE),
+                    )
+                ): selector.BooleanSelector(),
+                vol.Optional(
+                    CONF_FLEET_STATUS_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_FLEET_STATUS_SENSOR,
+                        self.config_entry.data.get(CONF_FLEET_STATUS_SENSOR, DEFAULT_FLEET_STATUS_SENSOR),
+                    )
+                ): selector.BooleanSelector(),
+                vol.Optional(
+                    CONF_SCHEDULE,
+                    default=self.config_entry.options.get(
+                        CONF_SCHEDULE,
+                        self.config_entry.data.get(CONF_SCHEDULE, DEFAULT_SCHEDULE),
+                    )
+                ): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+                vol.Optional(
+                    CONF_FULL_DWELL,
+                    default=self.config_entry.options.get(
+                        CONF_FULL_DWELL,
+                        self.config_entry.data.get(CONF_FULL_DWELL, DEFAULT_FULL_DWELL),
+                    )
+                ): FULL_DWELL_SELECTOR,
+                vol.Optional(
+                    CONF_POWER_STATISTIC,
+                    default=self.config_entry.options.get(
+                        CONF_POWER_STATISTIC,
+                        self.config_entry.data.get(CONF_POWER_STATISTIC, DEFAULT_POWER_STATISTIC),
+                    )
+                ): POWER_STATISTIC_SELECTOR,
+                vol.Optional(
+                    CONF_MIN_REFRESH_INTERVAL,
+                    default=self.config_entry.options.get(
+                        CONF_MIN_REFRESH_INTERVAL,
+                        self.config_entry.data.get(CONF_MIN_REFRESH_INTERVAL, DEFAULT_MIN_REFRESH_INTERVAL),
+                    )
+                ): MIN_REFRESH_INTERVAL_SELECTOR,
+                vol.Optional(
+                    CONF_MAX_REFRESH_INTERVAL,
+                    default=self.config_entry.options.get(
+                        CONF_MAX_REFRESH_INTERVAL,
+                        self.config_entry.data.get(CONF_MAX_REFRESH_INTERVAL, DEFAULT_MAX_REFRESH_INTERVAL),
+                    )
+                ): MAX_REFRESH_INTERVAL_SELECTOR,
+                vol.Optional(
+                    CONF_EXTRA_HUMIDITY,
+                    default=self.config_entry.options.get(
+                        CONF_EXTRA_HUMIDITY,
+                        self.config_entry.data.get(CONF_EXTRA_HUMIDITY, DEFAULT_EXTRA_HUMIDITY),
+                    )
+                ): EXTRA_HUMIDITY_SELECTOR,
+                vol.Optional(
+                    CONF_HUMIDITY_AGGREGATION,
+                    default=self.config_entry.options.get(
+                        CONF_HUMIDITY_AGGREGATION,
+                        self.config_entry.data.get(CONF_HUMIDITY_AGGREGATION, DEFAULT_HUMIDITY_AGGREGATION),
+                    )
+                ): HUMIDITY_AGGREGATION_SELECTOR,
+                vol.Optional(
+                    CONF_HUMIDITY_WEIGHTS,
+                    default=self.config_entry.options.get(
+                        CONF_HUMIDITY_WEIGHTS,
+                        self.config_entry.data.get(CONF_HUMIDITY_WEIGHTS, DEFAULT_HUMIDITY_WEIGHTS),
+                    )
+                ): selector.TextSelector(),
+                vol.Optional(
+                    CONF_HUMIDITY_MAX_AGE,
+                    default=self.config_entry.options.get(
+                        CONF_HUMIDITY_MAX_AGE,
+                        self.config_entry.data.get(CONF_HUMIDITY_MAX_AGE, DEFAULT_HUMIDITY_MAX_AGE),
+                    )
+                ): HUMIDITY_MAX_AGE_SELECTOR,
+                vol.Optional(
+                    CONF_CIRCUIT,
+                    default=self.config_entry.options.get(
+                        CONF_CIRCUIT,
+                        self.config_entry.data.get(CONF_CIRCUIT, DEFAULT_CIRCUIT),
+                    )
+                ): selector.TextSelector(),
+                vol.Optional(
+                    CONF_CIRCUIT_BUDGET,
+                    default=self.config_entry.options.get(
+                        CONF_CIRCUIT_BUDGET,
+                        self.config_entry.data.get(CONF_CIRCUIT_BUDGET, DEFAULT_CIRCUIT_BUDGET),
+                    )
+                ): CIRCUIT_BUDGET_SELECTOR,
+                vol.Optional(
+                    CONF_MIN_ON_TIME,
+                    default=self.config_entry.options.get(
+                        CONF_MIN_ON_TIME,
+                        self.config_entry.data.get(CONF_MIN_ON_TIME, DEFAULT_MIN_ON_TIME),
+                    )
+                ): MIN_DWELL_SELECTOR,
+                vol.Optional(
+                    CONF_MIN_OFF_TIME,
+                    default=self.config_entry.options.get(
+                        CONF_MIN_OFF_TIME,
+                        self.config_entry.data.get(CONF_MIN_OFF_TIME, DEFAULT_MIN_OFF_TIME),
+                    )
+                ): MIN_DWELL_SELECTOR,
+                vol.Optional(
+                    CONF_PRICE_SENSOR,
+                    description={
+                        "suggested_value": self.config_entry.options.get(
+                            CONF_PRICE_SENSOR,
+                            self.config_entry.data.get(CONF_PRICE_SENSOR),
+                        )
+                    },
+                ): PRICE_SENSOR_SELECTOR,
+                vol.Optional(
+                    CONF_PRICE_RUNTIME,
+                    default=self.config_entry.options.get(
+                        CONF_PRICE_RUNTIME,
+                        self.config_entry.data.get(CONF_PRICE_RUNTIME, DEFAULT_PRICE_RUNTIME),
+                    )
+                ): PRICE_RUNTIME_SELECTOR,
+                vol.Optional(
+                    CONF_PRICE_BLOCK,
+                    default=self.config_entry.options.get(
+                        CONF_PRICE_BLOCK,
+                        self.config_entry.data.get(CONF_PRICE_BLOCK, DEFAULT_PRICE_BLOCK),
+                    )
+                ): PRICE_BLOCK_SELECTOR,
+            }),
+            errors=errors,
         )
 
@@ -10,6 +10,25 @@ CONF_HUMIDITY_ON = "humidity_on_threshold"
 CONF_HUMIDITY_OFF = "humidity_off_threshold"
 CONF_START_TIME = "start_time"
 CONF_END_TIME = "end_time"
+CONF_EVENT_DRIVEN = "event_driven"
+CONF_FLEET_MODE = "fleet_mode"
+CONF_SCHEDULE = "schedule"
+CONF_FULL_DWELL = "full_dwell"
+CONF_POWER_STATISTIC = "power_statistic"
+CONF_MIN_REFRESH_INTERVAL = "min_refresh_interval"
+CONF_MAX_REFRESH_INTERVAL = "max_refresh_interval"
+CONF_EXTRA_HUMIDITY = "extra_humidity_sensors"
+CONF_HUMIDITY_AGGREGATION = "humidity_aggregation"
+CONF_HUMIDITY_WEIGHTS = "humidity_weights"
+CONF_HUMIDITY_MAX_AGE = "humidity_max_age"
+CONF_CIRCUIT = "circuit"
+CONF_CIRCUIT_BUDGET = "circuit_budget"
+CONF_MIN_ON_TIME = "min_on_time"
+CONF_MIN_OFF_TIME = "min_off_time"
+CONF_PRICE_SENSOR = "price_sensor"
+CONF_PRICE_RUNTIME = "price_runtime"
+CONF_PRICE_BLOCK = "price_block"
+CONF_FLEET_STATUS_SENSOR = "fleet_status_sensor"
 
 # Default values for configuration
 DEFAULT_FULL_THRESHOLD = 2.0  # Watts: below this is considered full
@@ -17,4 +36,80 @@ DEFAULT_HUMIDITY_ON = 60      # Percentage: start dehumidifying above this
 DEFAULT_HUMIDITY_OFF = 50     # Percentage: stop dehumidifying below this
 DEFAULT_START_TIME = "09:00:00"
 DEFAULT_END_TIME = "20:00:00"
+DEFAULT_EVENT_DRIVEN = False  # Poll on a fixed interval unless enabled
+DEFAULT_FLEET_MODE = False    # Each entry runs its own timer and store unless enabled
+DEFAULT_SCHEDULE = ""         # Empty: a single daily window from start_time to end_time
+DEFAULT_FULL_DWELL = 60       # Seconds: power must stay low this long to be considered full
+DEFAULT_POWER_STATISTIC = "sample"  # Full detection on single readings unless median/ewma is chosen
+DEFAULT_MIN_REFRESH_INTERVAL = 10   # Seconds: polling interval while something is about to change
+DEFAULT_MAX_REFRESH_INTERVAL = 300  # Seconds: polling interval while idle
+DEFAULT_EXTRA_HUMIDITY = []         # Only the main humidity sensor unless more are added
+DEFAULT_HUMIDITY_AGGREGATION = "mean"
+DEFAULT_HUMIDITY_WEIGHTS = ""       # Empty: every humidity sensor weighs 1
+DEFAULT_HUMIDITY_MAX_AGE = 0        # Seconds: 0 keeps a reading until its sensor reports again
+DEFAULT_CIRCUIT = ""                # Empty: switches on without waiting for other dehumidifiers
+DEFAULT_CIRCUIT_BUDGET = 0          # Watts: 0 only staggers starts on the circuit
+DEFAULT_MIN_ON_TIME = 0             # Seconds: shortest run humidity may end; 0 also disables trend holds
+DEFAULT_MIN_OFF_TIME = 0            # Seconds: shortest rest before humidity may start the unit again
+DEFAULT_PRICE_RUNTIME = 6           # Hours per day the price plan sets aside for running
+DEFAULT_PRICE_BLOCK = 60            # Minutes: shortest run window the price plan picks
+DEFAULT_FLEET_STATUS_SENSOR = False # No aggregate sensor unless enabled
+
+# Event-driven control
+EVENT_DEBOUNCE_COOLDOWN = 0.5  # Seconds: coalesce bursts of state changes into one refresh
+
+# Adaptive polling
+HUMIDITY_NEAR_MARGIN = 2  # Percentage points: humidity this close to a threshold polls at the minimum interval
+
+# Humidity trend: least-squares line through recent readings
+TREND_WINDOW = 1800          # Seconds of readings the line is fitted through
+TREND_MAX_SAMPLES = 120      # Readings kept at most, however fast the sensors report
+TREND_MIN_SAMPLES = 3        # Readings needed before the trend is used
+TREND_MIN_SPAN = 120         # Seconds the readings must span before the trend is used
+TREND_PREDICTION_TIME = 900  # Seconds ahead the predicted humidity attribute looks
+
+# Power analytics for full detection
+POWER_WINDOW_SIZE = 15          # Recent power samples kept per plug for the rolling median
+POWER_EWMA_TIME_CONSTANT = 30   # Seconds: time constant of the power moving average
+
+# Persistence
+STORE_SAVE_DELAY = 10  # Seconds: changes within this window are written together
+ENERGY_SAVE_INTERVAL = 3600  # Seconds: energy totals alone are written at most this often
+
+# Transition log: append-only binary files under .storage
+TRANSLOG_DIRECTORY = f"{DOMAIN}_log"
+TRANSLOG_MAX_BYTES = 65536   # Bytes per file before it is rotated (8 bytes per transition)
+TRANSLOG_FILES = 4           # Files kept per dehumidifier, the current one included
+TRANSLOG_FLUSH_DELAY = 30    # Seconds: transitions within this window are written together
+TRANSLOG_SUMMARY_DAYS = 30   # Days counted by the summary attributes
+
+# Decision trace
+TRACE_CAPACITY = 200  # Decision records kept per dehumidifier
+SERVICE_GET_TRACE = "get_trace"
+
+# Saved state of every entry, preloaded at startup
+DATA_RESTORE = "restore"
+
+# Entity ids resolved from the registry, shared by all entries
+DATA_ENTITY_INDEX = "entity_index"
+
+# Fleet mode: shared scheduler and consolidated store
+DATA_FLEET = "fleet"
+FLEET_TICK_INTERVAL = 5  # Seconds: how often the fleet checks which members are due
+FLEET_STORAGE_KEY = f"{DOMAIN}_fleet"
+
+# Fleet status: one websocket stream and one sensor for all dehumidifiers
+DATA_STATUS = "status"
+STATUS_PUSH_DELAY = 1  # Seconds: changes within this window are sent together
+
+# Shared circuits: staggered, budgeted starts
+DATA_CIRCUITS = "circuits"
+CIRCUIT_STAGGER_INTERVAL = 10      # Seconds: at least this long between two starts on a circuit
+CIRCUIT_RESERVATION_TIME = 60      # Seconds: a start counts at its expected draw until its power sensor catches up
+CIRCUIT_DEFAULT_START_POWER = 300  # Watts: expected draw of a unit that has not been seen running yet
+
+# Switch commands
+ACTUATOR_TIMEOUT = 10          # Seconds: per attempt, until the plug reports the new state
+ACTUATOR_MAX_ATTEMPTS = 3
+ACTUATOR_BACKOFF = 2           # Seconds: delay before the first retry, doubled for each further one
 
@@ -1,187 +1,687 @@
+import asyncio
 from datetime import datetime, timedelta
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, Event, State, callback
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_point_in_time,
+    async_track_state_change_event,
+)
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers.entity_component import DEFAULT_SCAN_INTERVAL
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 from homeassistant.util import dt as dt_util
 import logging
+import time
 
 from .const import *
+from .actuator import SwitchActuator
+from .analytics import PowerStats
+from .energy import ON_SECONDS, EnergyCounter
+from .entity_index import ResolvedEntities
+from .humidity import HumidityAggregate, parse_weights
+from .engine import (
+    ACTION_TURN_ON,
+    ACTION_TURN_OFF,
+    EngineConfig,
+    EngineInput,
+    EngineState,
+    evaluate,
+    hold_until,
+    refresh_interval,
+    REASON_NONE,
+    REASONS,
+)
+from .metrics import CoordinatorMetrics
 from .models import DehumidifierConfig
+from .pricing import PricePlan, parse_forecast, plan_cheapest
+from .schedule import Schedule
+from .trace import DecisionTrace
+from .translog import (
+    EVENT_FULL,
+    EVENT_FULL_CLEARED,
+    EVENT_NAMES,
+    EVENT_OFF,
+    EVENT_ON,
+    EVENT_OVERRIDE,
+    EVENT_OVERRIDE_CLEARED,
+    TransitionLog,
+    humidity_of,
+    pack,
+)
+from .trend import HumidityTrend
 from .utils import slugify
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _sample_time(state_switch: State, state_power: State) -> float:
+    # A reading from before the plug was switched on only counts from the switch-on
+    return max(state_power.last_updated, state_switch.last_changed).timestamp()
+
+
+_REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+# Decision flag and the events logged when it goes up and down
+_LOGGED_FLAGS = ((EVENT_ON, EVENT_OFF), (EVENT_FULL, EVENT_FULL_CLEARED), (EVENT_OVERRIDE, EVENT_OVERRIDE_CLEARED))
+
+
+def _isoformat(timestamp: float | None) -> str | None:
+    return dt_util.utc_from_timestamp(timestamp).isoformat() if timestamp is not None else None
+
+
 class DehumidifierCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass: HomeAssistant, config: DehumidifierConfig):
+    def __init__(self, hass: HomeAssistant, config: DehumidifierConfig, entities: ResolvedEntities, storage=None):
         self.hass = hass
         self.config = config
-        self.storage = Store(hass, 1, f"{DOMAIN}_{slugify(config.name)}")
-        self._last_auto_on = None
-        self._power_low_since = None
-        self._manual_override = False
-        self._last_switch_state = None
-        self._auto_turning_on = False
-        self._is_full_latched = False
+        self.entities = entities
+        # Fleet members pass a view onto the consolidated fleet store
+        self.storage = storage or Store(hass, 1, f"{DOMAIN}_{slugify(config.name)}")
+        self._engine_config = EngineConfig(
+            humidity_on=config.humidity_on_threshold,
+            humidity_off=config.humidity_off_threshold,
+            full_power_threshold=config.full_power_threshold,
+            full_delay=config.full_dwell,
+            min_on_time=config.min_on_time,
+            min_off_time=config.min_off_time,
+        )
+        self.schedule = self._compile_schedule(config)
+        self._inside_schedule = None
+        self._schedule_until = None
+        # Run windows planned from the price sensor's forecast, replacing the schedule while it lasts
+        self.price_plan: PricePlan | None = None
+        self._price_attributes = None
+        self._price_slots = None
+        self._state = EngineState()
+        self.power_stats = PowerStats(
+            POWER_WINDOW_SIZE, config.full_power_threshold, config.power_statistic, POWER_EWMA_TIME_CONSTANT
+        )
+        self.humidity = self._create_humidity_aggregate(config, entities)
+        self.trend = HumidityTrend(TREND_WINDOW, TREND_MAX_SAMPLES, TREND_MIN_SAMPLES, TREND_MIN_SPAN)
+        self.actuator = SwitchActuator(hass, entities.switch_entity, config.name)
+        entities.async_add_listener(self._async_entities_changed)
+        self._unsub_state_events = None
+        self._unsub_samples = None
+        self._unsub_timer = None
+        self._timer_at = None
+        self._hold_until = None
+        self._refresh_task = None
+        self._cooldown_until = 0.0
+        self._unsub_pending = None
+        self._saved_data = None
+        self._saved_energy = None
+        self._energy_save_due = 0.0
+        self._save_pending = False
+        self.metrics = CoordinatorMetrics()
+        self.energy = EnergyCounter()
+        self.trace = DecisionTrace(TRACE_CAPACITY)
+        self.transition_log = TransitionLog(
+            hass.config.path(STORAGE_DIR, TRANSLOG_DIRECTORY), slugify(config.name), TRANSLOG_MAX_BYTES, TRANSLOG_FILES
+        )
+        self.log_summary = None
+        self._log_flags = None
+        self._log_pending = []
+        self._log_lock = asyncio.Lock()
+        self._log_summary_day = None
+        self._unsub_log_flush = None
+        self._switch_reason = REASON_NONE
+        self._day_start = None
+        self._day_end = None
+        # Event-driven coordinators have no polling interval to adapt
+        self.refresh_interval = None if config.event_driven else DEFAULT_SCAN_INTERVAL.total_seconds()
+        self.next_refresh = 0.0
+        # Set by the CircuitScheduler this dehumidifier shares a circuit through, if any
+        self.circuit = None
+        self.power = None
+        self.running_power = None
 
+        # Event-driven coordinators refresh on state changes and armed timers, and fleet
+        # members on the shared fleet timer, so only standalone ones poll on their own
         super().__init__(
             hass,
             _LOGGER,
             name=f"DehumidifierCoordinator_{config.name}",
-            update_interval=DEFAULT_SCAN_INTERVAL,
+            update_interval=None if config.event_driven or config.fleet_mode else DEFAULT_SCAN_INTERVAL,
         )
 
-        hass.loop.create_task(self.load_persistent_data())
-
     async def _async_update_data(self):
+        started = time.perf_counter()
+        self.metrics.updates += 1
         try:
-            state_switch = self.hass.states.get(self.config.switch_entity)
-            state_power = self.hass.states.get(self.config.power_sensor)
-            state_humidity = self.hass.states.get(self.config.humidity_sensor)
+            entities = self.entities
+            state_switch = self.hass.states.get(entities.switch_entity)
+            state_power = self.hass.states.get(entities.power_sensor)
 
-            if not state_switch or not state_power or not state_humidity:
+            if not state_switch or not state_power:
+                self.metrics.state_read_misses += 1
                 raise UpdateFailed("Missing one or more entity states")
 
-            if state_power.state in ("unavailable", "unknown") or state_humidity.state in ("unavailable", "unknown"):
-                raise UpdateFailed("Power or humidity sensor is unavailable")
+            if state_power.state in ("unavailable", "unknown"):
+                self.metrics.state_read_misses += 1
+                raise UpdateFailed("Power sensor is unavailable")
 
-            auto_switch_id = f"switch.{slugify(f'{self.config.name}_control')}"
-            state_auto = self.hass.states.get(auto_switch_id)
-            auto_enabled = state_auto and state_auto.state == "on"
-            _LOGGER.debug(f"{self.config.name} - Found auto switch entity: {auto_switch_id} with state: {state_auto.state if state_auto else 'Not found'}")
+            now_local = dt_util.now()
+            if entities.price_sensor and self._price_slots is None:
+                self._async_price_forecast(self.hass.states.get(entities.price_sensor))
+            humidity = self._async_humidity(now_local.timestamp())
+            if humidity is None:
+                self.metrics.state_read_misses += 1
+                raise UpdateFailed("No humidity sensor is available")
 
-            is_on = state_switch.state == "on"
-            power = float(state_power.state)
-            humidity = float(state_humidity.state)
+            state_auto = self.hass.states.get(entities.auto_switch) if entities.auto_switch else None
 
-            now_local = dt_util.now()
-            now_utc = dt_util.utcnow()
-            now = now_local.time()
-
-            start = self.config.start_time
-            end = self.config.end_time
-            # Schedule handles cross-midnight periods
-            inside_schedule = start <= now <= end if start < end else now >= start or now <= end
-
-            humidity_low = humidity < self.config.humidity_off_threshold
-            humidity_high = humidity > self.config.humidity_on_threshold
-
-            # Manual override detection
-            previous_state = self._last_switch_state
-            self._last_switch_state = state_switch.state
-
-            if previous_state is not None and previous_state != state_switch.state:
-                if state_switch.state == "on" and not self._auto_turning_on:
-                    self._manual_override = True
-                    _LOGGER.debug(f"{self.config.name} - Manual override detected: switch turned on manually.")
-                elif state_switch.state == "off":
-                    self._manual_override = False
-                    _LOGGER.debug(f"{self.config.name} - Switch turned off. Clearing manual override.")
-                await self.save_persistent_data()
-
-            # Full detection logic and latching
-            is_full = False
-            if is_on and power < self.config.full_power_threshold:
-                if not self._power_low_since:
-                    self._power_low_since = now_utc
-                    _LOGGER.debug(f"{self.config.name} - Power dropped below threshold. Starting full timer...")
-                    await self.save_persistent_data()
-            else:
-                if self._power_low_since:
-                    _LOGGER.debug(f"{self.config.name} - Power no longer low. Clearing full timer.")
-                self._power_low_since = None
-                await self.save_persistent_data()
-                if self._is_full_latched:
-                    _LOGGER.debug(f"{self.config.name} - Tank no longer full. Clearing latched full state.")
-                    self._is_full_latched = False
-                    await self.save_persistent_data()
-
-            if self._power_low_since:
-                elapsed = now_utc - self._power_low_since
-                if elapsed >= timedelta(seconds=60):
-                    is_full = True
-                    if not self._is_full_latched:
-                        _LOGGER.debug(f"{self.config.name} - Power has been low for {elapsed}. Marking as full and latching.")
-                        self._is_full_latched = True
-                        await self.save_persistent_data()
-                else:
-                    _LOGGER.debug(f"{self.config.name} - Power low for {elapsed.total_seconds():.0f}s but threshold not yet met.")
-
-            if self._is_full_latched:
-                is_full = True
-
-            _LOGGER.debug(
-                f"{self.config.name} - Conditions: auto_enabled={auto_enabled}, inside_schedule={inside_schedule}, "
-                f"is_on={is_on}, humidity_low={humidity_low}, humidity_high={humidity_high}, "
-                f"is_full={is_full}, manual_override={self._manual_override}"
+            raw_power = float(state_power.state)
+            self._async_track_draw(raw_power, state_switch.state == "on")
+            self.energy.add(
+                now_local.timestamp(), raw_power, state_switch.state == "on", self._async_day_start(now_local.timestamp())
             )
-
-            # Automatic control logic
-            if auto_enabled:
-                self._auto_turning_on = False
-                if inside_schedule:
-                    if humidity_high and not is_full and not is_on:
-                        _LOGGER.info(f"{self.config.name} - Turning on dehumidifier...")
-                        self._auto_turning_on = True
-                        await self.hass.services.async_call("switch", "turn_on", {"entity_id": self.config.switch_entity}, blocking=True)
-                        self._last_auto_on = now_utc
-                        self._manual_override = False
-                        await self.save_persistent_data()
-                    elif humidity_low and is_on:
-                        _LOGGER.info(f"{self.config.name} - Humidity below threshold. Turning off dehumidifier...")
-                        await self.hass.services.async_call("switch", "turn_off", {"entity_id": self.config.switch_entity}, blocking=True)
-                        self._manual_override = False
-                        await self.save_persistent_data()
-                else:
-                    if is_on:
-                        if humidity_low:
-                            _LOGGER.info(f"{self.config.name} - Outside schedule and humidity low. Turning off dehumidifier...")
-                            await self.hass.services.async_call("switch", "turn_off", {"entity_id": self.config.switch_entity}, blocking=True)
-                            self._manual_override = False
-                            await self.save_persistent_data()
-                        elif self._manual_override:
-                            _LOGGER.debug(f"{self.config.name} - Outside schedule. Manually turned on. Leaving dehumidifier on.")
-                        elif is_full:
-                            _LOGGER.debug(f"{self.config.name} - Outside schedule and latched full. Leaving dehumidifier on.")
-                        else:
-                            _LOGGER.info(f"{self.config.name} - Outside schedule. Turning off dehumidifier...")
-                            await self.hass.services.async_call("switch", "turn_off", {"entity_id": self.config.switch_entity}, blocking=True)
-
-            _LOGGER.debug(
-                f"{self.config.name} - Dehumidifier data: is_on={is_on}, power={power:.2f}, humidity={humidity:.2f}, "
-                f"inside_schedule={inside_schedule}, humidity_low={humidity_low}, humidity_high={humidity_high}, "
-                f"is_full={is_full}"
+            power = self._async_power_statistic(state_switch, state_power, raw_power)
+            if self._state.last_switch_state not in (None, state_switch.state):
+                # Drying and resting rooms trend differently: fit the new phase on its own
+                self.trend.clear()
+                self.trend.add(now_local.timestamp(), humidity)
+            inputs = EngineInput(
+                now=now_local.timestamp(),
+                switch_state=state_switch.state,
+                power=power,
+                humidity=humidity,
+                auto_enabled=state_auto is not None and state_auto.state == "on",
+                inside_schedule=self._async_inside_schedule(now_local),
+                commanded_on=ACTION_TURN_ON in (self.actuator.in_flight, self.actuator.async_pop_confirmed()),
+                power_low_since=self.power_stats.below_since,
+                humidity_slope=self.trend.slope(now_local.timestamp()),
             )
 
-            return {
-                "is_on": is_on,
-                "is_full": is_full,
-                "inside_schedule": inside_schedule,
-                "humidity_low": humidity_low,
-                "humidity_high": humidity_high,
-                "manual_override": self._manual_override,
-            }
+            decision = evaluate(self._engine_config, inputs, self._state)
+            if self.circuit is not None:
+                if ACTION_TURN_ON not in decision.actions:
+                    self.circuit.async_withdraw(self)
+                    if ACTION_TURN_OFF in decision.actions:
+                        self.circuit.async_release(self)
+                elif not self.circuit.async_admit(self, inputs.humidity - self.config.humidity_on_threshold):
+                    # Not our turn on the circuit yet: it refreshes us once admitted
+                    inputs.start_allowed = False
+                    decision = evaluate(self._engine_config, inputs, self._state)
+            if decision.is_full and not self._state.is_full_latched:
+                self.energy.count_full()
+            self._state = decision.state
+            self._hold_until = hold_until(self._engine_config, decision)
+
+            self.trace.record(inputs.now, inputs, decision)
+            self._async_log_transitions(inputs, decision)
+            if self._log_summary_day is not None and self._async_day_start(inputs.now) != self._log_summary_day:
+                # A new day: let the oldest transitions drop out of the summary
+                self.async_schedule_log_flush()
+
+            for action in decision.actions:
+                _LOGGER.info(f"{self.config.name} - {action.replace('_', ' ').capitalize()} dehumidifier ({decision.reason})")
+                self.actuator.async_request(action)
+                self._switch_reason = decision.reason
+
+            if not self.config.event_driven:
+                self.refresh_interval = refresh_interval(
+                    self._engine_config,
+                    inputs,
+                    decision,
+                    self.config.min_refresh_interval,
+                    max(self.config.max_refresh_interval, self.config.min_refresh_interval),
+                    DEFAULT_SCAN_INTERVAL.total_seconds(),
+                    HUMIDITY_NEAR_MARGIN,
+                )
+                if self.update_interval is not None:
+                    self.update_interval = timedelta(seconds=self.refresh_interval)
+
+            self._async_arm_timer()
+
+            return decision.as_dict()
 
         except Exception as e:
+            self.metrics.updates_failed += 1
             raise UpdateFailed(f"Error updating dehumidifier data: {e}")
+        finally:
+            self.metrics.update_duration.record((time.perf_counter() - started) * 1000)
+            if self.refresh_interval is not None:
+                self.next_refresh = self.hass.loop.time() + self.refresh_interval
+            self.async_schedule_save()
+
+    @property
+    def engine_state(self) -> EngineState:
+        """Controller state as of the last evaluation."""
+        return self._state
+
+    def _compile_schedule(self, config: DehumidifierConfig) -> Schedule:
+        if config.schedule:
+            try:
+                return Schedule.parse(config.schedule)
+            except ValueError as e:
+                _LOGGER.error(f"{config.name} - Invalid schedule, using start/end time instead: {e}")
+        return Schedule.daily(config.start_time, config.end_time)
+
+    def _create_humidity_aggregate(self, config: DehumidifierConfig, entities: ResolvedEntities) -> HumidityAggregate:
+        sensors = entities.humidity_sensors
+        try:
+            weights = parse_weights(config.humidity_weights, len(sensors))
+        except ValueError as e:
+            _LOGGER.error(f"{config.name} - Invalid humidity weights, weighing all sensors equally: {e}")
+            weights = None
+        return HumidityAggregate(sensors, config.humidity_aggregation, weights, config.humidity_max_age)
+
+    @callback
+    def _async_humidity(self, now: float) -> float | None:
+        """Aggregated humidity; only sensors without a current reading are read from the state machine."""
+        for entity_id in self.humidity.sensors:
+            if not self.humidity.has_reading(entity_id):
+                self._async_humidity_reading(entity_id, self.hass.states.get(entity_id))
+        return self.humidity.value(now)
+
+    @callback
+    def _async_humidity_reading(self, entity_id: str, state: State | None):
+        try:
+            value = float(state.state) if state else None
+        except ValueError:
+            # unavailable, unknown or garbage: the sensor drops out until it reports a number
+            value = None
+        if value is None:
+            self.humidity.update(entity_id, None, None)
+            return
+        timestamp = state.last_updated.timestamp()
+        self.humidity.update(entity_id, value, timestamp)
+        max_age = self.humidity.max_age
+        if max_age and timestamp + max_age <= dt_util.utcnow().timestamp():
+            # A stale reading read again on refresh: it is about to drop out and says nothing about the trend
+            return
+        aggregate = self.humidity.value(timestamp)
+        if aggregate is not None:
+            self.trend.add(timestamp, aggregate)
+
+    @callback
+    def _async_inside_schedule(self, now_local: datetime) -> bool:
+        """Whether the price plan covering now, or else the schedule, is open.
+
+        Looked up again only once the cached answer expires.
+        """
+        if self._inside_schedule is None or (self._schedule_until is not None and now_local >= self._schedule_until):
+            plan = self.price_plan
+            now = now_local.timestamp()
+            if plan is not None and plan.covers(now):
+                self._inside_schedule = plan.is_active(now)
+                self._schedule_until = dt_util.as_local(dt_util.utc_from_timestamp(plan.next_transition(now)))
+                return self._inside_schedule
+            self._inside_schedule = self.schedule.is_active(now_local)
+            next_change = self.schedule.next_transition(now_local.replace(tzinfo=None))
+            self._schedule_until = next_change.replace(tzinfo=now_local.tzinfo) if next_change else None
+            if plan is not None and now < plan.start:
+                plan_start = dt_util.as_local(dt_util.utc_from_timestamp(plan.start))
+                if self._schedule_until is None or plan_start < self._schedule_until:
+                    self._schedule_until = plan_start
+        return self._inside_schedule
+
+    @callback
+    def _async_price_forecast(self, state: State | None) -> bool:
+        """Plan run windows from the price sensor's forecast if the forecast changed; True if it did."""
+        attributes = state.attributes if state else None
+        # The state machine keeps the attributes object when only the state (the current price) changes
+        if self._price_slots is not None and attributes is self._price_attributes:
+            return False
+        self._price_attributes = attributes
+        slots = parse_forecast(attributes, dt_util.DEFAULT_TIME_ZONE) if attributes else ()
+        if slots == self._price_slots:
+            return False
+        self._price_slots = slots
+        now = dt_util.utcnow().timestamp()
+        done_today = self.energy.today[ON_SECONDS] if self.energy.day_start == self._async_day_start(now) else 0
+        self.price_plan = plan_cheapest(
+            slots,
+            self.config.price_runtime * 3600,
+            self.config.price_block * 60,
+            lambda timestamp: dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date(),
+            now,
+            done_today,
+        )
+        self.metrics.price_plans += 1
+        if self.price_plan is None:
+            _LOGGER.debug(f"{self.config.name} - No usable price forecast, following the schedule")
+        else:
+            _LOGGER.debug(f"{self.config.name} - Planned {len(self.price_plan.windows)} run windows from the price forecast")
+        # The cached schedule answer may no longer hold
+        self._inside_schedule = None
+        return True
+
+    @callback
+    def _async_power_statistic(self, state_switch: State, state_power: State, power: float) -> float:
+        """The power value full detection runs on, per the configured statistic."""
+        if state_switch.state != "on":
+            # Readings while the plug is off say nothing about the tank
+            self.power_stats.reset()
+            return power
+        # The state event for this reading may not have been handled yet
+        self.power_stats.add(_sample_time(state_switch, state_power), power)
+        return self.power_stats.value
+
+    @callback
+    def _async_sample(self, event: Event):
+        if event.data["entity_id"] == self.entities.power_sensor:
+            self._async_power_sample(event)
+        elif event.data["entity_id"] == self.entities.price_sensor:
+            if self._async_price_forecast(event.data.get("new_state")):
+                self._async_request_event_refresh()
+        else:
+            self._async_humidity_reading(event.data["entity_id"], event.data.get("new_state"))
+
+    @callback
+    def _async_power_sample(self, event: Event):
+        new_state = event.data.get("new_state")
+        if not new_state:
+            return
+        try:
+            power = float(new_state.state)
+        except ValueError:
+            return
+        switch_state = self.hass.states.get(self.entities.switch_entity)
+        is_on = switch_state is not None and switch_state.state == "on"
+        timestamp = new_state.last_updated.timestamp()
+        self.energy.add(timestamp, power, is_on, self._async_day_start(timestamp))
+        self._async_track_draw(power, is_on)
+        if not is_on:
+            self.power_stats.reset()
+            return
+        self.power_stats.add(_sample_time(switch_state, new_state), power)
+
+    @callback
+    def _async_track_draw(self, power: float, is_on: bool):
+        """Remember the latest draw, and what the unit typically draws while running."""
+        # Standby readings of a plug that is off are not load on the circuit
+        self.power = power if is_on else 0.0
+        if is_on and power >= self.config.full_power_threshold:
+            self.running_power = power if self.running_power is None else 0.8 * self.running_power + 0.2 * power
+
+    @callback
+    def _async_log_transitions(self, inputs: EngineInput, decision):
+        """Buffer a log record for every on/off, full and override flag that changed since the last evaluation."""
+        flags = (decision.is_on, decision.is_full, decision.state.manual_override)
+        previous, self._log_flags = self._log_flags, flags
+        if previous is None or previous == flags:
+            return
+        for index, (raised, cleared) in enumerate(_LOGGED_FLAGS):
+            if flags[index] == previous[index]:
+                continue
+            if index == 0:
+                # The plug follows a command one evaluation later; log why it was sent
+                reason, self._switch_reason = self._switch_reason, REASON_NONE
+            else:
+                reason = decision.reason
+            self._log_pending.append(
+                pack(inputs.now, raised if flags[index] else cleared, _REASON_CODES.get(reason, 0), inputs.humidity)
+            )
+        self.async_schedule_log_flush()
+
+    @callback
+    def async_schedule_log_flush(self):
+        if self._unsub_log_flush is None:
+            self._unsub_log_flush = async_call_later(self.hass, TRANSLOG_FLUSH_DELAY, self._async_log_flush_due)
+
+    @callback
+    def _async_log_flush_due(self, _now):
+        self._unsub_log_flush = None
+        self.hass.async_create_task(self.async_flush_log(), f"{self.config.name} transition log")
+
+    async def async_flush_log(self):
+        """Write buffered transitions in the executor and recount the summary."""
+        if self._unsub_log_flush:
+            self._unsub_log_flush()
+            self._unsub_log_flush = None
+        async with self._log_lock:
+            data = b"".join(self._log_pending)
+            self._log_pending.clear()
+            now = dt_util.utcnow().timestamp()
+            self._log_summary_day = self._async_day_start(now)
+            try:
+                self.log_summary = await self.hass.async_add_executor_job(
+                    self._write_log, data, now - TRANSLOG_SUMMARY_DAYS * 86400
+                )
+            except OSError as e:
+                _LOGGER.error(f"{self.config.name} - Could not write the transition log: {e}")
+
+    def _write_log(self, data: bytes, since: float) -> dict[int, int]:
+        if data:
+            self.transition_log.write(data)
+        return self.transition_log.count(since)
+
+    async def async_read_transitions(self, limit: int) -> list[dict]:
+        """The most recent transitions, newest first, buffered ones included."""
+        await self.async_flush_log()
+        async with self._log_lock:
+            records = await self.hass.async_add_executor_job(self.transition_log.read, limit)
+        return [
+            {
+                "time": _isoformat(record[0]),
+                "event": EVENT_NAMES.get(record[1], record[1]),
+                "reason": REASONS[record[2]] if record[2] < len(REASONS) else record[2],
+                "humidity": humidity_of(record),
+            }
+            for record in records
+        ]
+
+    @callback
+    def async_circuit_admitted(self):
+        """Our turn to start on the shared circuit: evaluate again right away."""
+        self._async_request_event_refresh()
+
+    @callback
+    def _async_day_start(self, timestamp: float) -> float:
+        """Start of the local day containing timestamp, recomputed only after midnight."""
+        if self._day_end is None or not self._day_start <= timestamp < self._day_end:
+            start = dt_util.start_of_local_day(dt_util.as_local(dt_util.utc_from_timestamp(timestamp)))
+            self._day_start = start.timestamp()
+            self._day_end = dt_util.start_of_local_day(start + timedelta(days=1, hours=1)).timestamp()
+        return self._day_start
+
+    @callback
+    def async_start_event_tracking(self):
+        """Collect power and humidity readings and, in event-driven mode, subscribe to every source entity."""
+        if not self._unsub_samples:
+            self._unsub_samples = async_track_state_change_event(
+                self.hass,
+                [
+                    entity_id
+                    for entity_id in (self.entities.power_sensor, *self.entities.humidity_sensors, self.entities.price_sensor)
+                    if entity_id
+                ],
+                self._async_sample,
+            )
+        if not self.config.event_driven or self._unsub_state_events:
+            return
+        self._unsub_state_events = async_track_state_change_event(
+            self.hass,
+            [
+                entity_id
+                for entity_id in (
+                    self.entities.switch_entity,
+                    self.entities.power_sensor,
+                    *self.entities.humidity_sensors,
+                    self.entities.auto_switch,
+                )
+                if entity_id
+            ],
+            self._async_source_state_changed,
+        )
+
+    @callback
+    def async_stop_event_tracking(self):
+        """Remove state change subscriptions and any armed timer."""
+        self._async_unsubscribe_states()
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._unsub_pending:
+            self._unsub_pending()
+            self._unsub_pending = None
+
+    @callback
+    def _async_unsubscribe_states(self):
+        if self._unsub_state_events:
+            self._unsub_state_events()
+            self._unsub_state_events = None
+        if self._unsub_samples:
+            self._unsub_samples()
+            self._unsub_samples = None
+
+    @callback
+    def _async_entities_changed(self, role: str, old_entity_id: str | None, new_entity_id: str | None):
+        """Follow a renamed or newly registered entity without waiting for a reload."""
+        if role == CONF_SWITCH:
+            self.actuator.entity_id = new_entity_id
+        if role in (CONF_HUMIDITY, CONF_EXTRA_HUMIDITY) and old_entity_id and new_entity_id:
+            self.humidity.rename(old_entity_id, new_entity_id)
+            # A reading the renamed sensor reported before this handler ran was not sampled
+            self._async_humidity_reading(new_entity_id, self.hass.states.get(new_entity_id))
+        if role == CONF_PRICE_SENSOR:
+            # Read the forecast of the renamed sensor on the next evaluation
+            self._price_slots = None
+        if self._unsub_samples:
+            self._async_unsubscribe_states()
+            self.async_start_event_tracking()
+        self._async_request_event_refresh()
+
+    @callback
+    def _async_source_state_changed(self, event: Event):
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        # Attribute-only updates cannot change any decision
+        if old_state and new_state and old_state.state == new_state.state:
+            return
+        self._async_request_event_refresh()
+
+    @callback
+    def _async_timer_due(self, _now):
+        self._unsub_timer = None
+        self._async_request_event_refresh()
+
+    @callback
+    def _async_pending_refresh_due(self, _now):
+        self._unsub_pending = None
+        self._async_request_event_refresh()
+
+    @callback
+    def _async_request_event_refresh(self):
+        """Refresh right away, or coalesce into one refresh after the cooldown.
+
+        Unlike the stock request debouncer this never drops a request that arrives
+        while a refresh is running, such as our own switch command landing.
+        """
+        if self._unsub_pending:
+            self.metrics.refreshes_coalesced += 1
+            return
+        if (self._refresh_task and not self._refresh_task.done()) or self.hass.loop.time() < self._cooldown_until:
+            self._unsub_pending = async_call_later(
+                self.hass, EVENT_DEBOUNCE_COOLDOWN, self._async_pending_refresh_due
+            )
+            return
+        self._cooldown_until = self.hass.loop.time() + EVENT_DEBOUNCE_COOLDOWN
+        self._refresh_task = self.hass.async_create_task(self.async_refresh())
+
+    @callback
+    def _async_arm_timer(self):
+        """Arm one timer for the next moment a decision can change without a state change.
+
+        That is either the next schedule transition or, in event-driven mode, the
+        full-tank dwell or a minimum on or off time running out. The timer is left
+        alone if the moment is unchanged.
+        """
+        due = self._schedule_until
+        if self.config.event_driven:
+            moments = [self._hold_until]
+            if self._state.power_low_since is not None and not self._state.is_full_latched:
+                moments.append(self._state.power_low_since + self.config.full_dwell)
+            for moment in moments:
+                if moment is None:
+                    continue
+                moment_at = dt_util.as_local(dt_util.utc_from_timestamp(moment))
+                if due is None or moment_at < due:
+                    due = moment_at
+
+        if self._unsub_timer and due == self._timer_at:
+            return
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._timer_at = due
+        if due is not None:
+            self._unsub_timer = async_track_point_in_time(self.hass, self._async_timer_due, due)
 
     async def load_persistent_data(self):
-        data = await self.storage.async_load()
+        self.async_restore(await self.storage.async_load())
+
+    @callback
+    def async_restore(self, data: dict | None):
+        """Apply saved state; must happen before the first evaluation, which would overwrite it."""
         if data:
-            if "last_auto_on" in data:
-                self._last_auto_on = dt_util.parse_datetime(data["last_auto_on"])
-            if "power_low_since" in data:
-                self._power_low_since = dt_util.parse_datetime(data["power_low_since"])
-            self._manual_override = data.get("manual_override", False)
-            self._last_switch_state = data.get("last_switch_state", None)
-            self._is_full_latched = data.get("is_full_latched", False)
+            if data.get("last_auto_on"):
+                self._state.last_auto_on = dt_util.parse_datetime(data["last_auto_on"]).timestamp()
+            if data.get("power_low_since"):
+                self._state.power_low_since = dt_util.parse_datetime(data["power_low_since"]).timestamp()
+            self._state.manual_override = data.get("manual_override", False)
+            self._state.last_switch_state = data.get("last_switch_state", None)
+            self._state.is_full_latched = data.get("is_full_latched", False)
+            if data.get("switched_at"):
+                self._state.switched_at = dt_util.parse_datetime(data["switched_at"]).timestamp()
+            if data.get("energy"):
+                self.energy.restore(data["energy"])
+            self._saved_data = self._persistent_data()
+            self._saved_energy = self.energy.as_dict()
+            self._energy_save_due = dt_util.utcnow().timestamp() + ENERGY_SAVE_INTERVAL
+
+    def _persistent_data(self) -> dict:
+        """The controller state that is written as soon as it changes; energy totals are added at write time."""
+        state = self._state
+        return {
+            "last_auto_on": _isoformat(state.last_auto_on),
+            "power_low_since": _isoformat(state.power_low_since),
+            "manual_override": state.manual_override,
+            "last_switch_state": state.last_switch_state,
+            "is_full_latched": state.is_full_latched,
+            "switched_at": _isoformat(state.switched_at),
+        }
+
+    def _persistent_data_for_write(self) -> dict:
+        """Called by the Store when the delayed write actually happens."""
+        data = self._persistent_data()
+        self._saved_data = data
+        self._saved_energy = self.energy.as_dict()
+        self._energy_save_due = dt_util.utcnow().timestamp() + ENERGY_SAVE_INTERVAL
+        self._save_pending = False
+        if not self.config.fleet_mode:
+            # Fleet members only hand over a record; the fleet counts the writes of its shared file
+            self.metrics.store_writes += 1
+        return {**data, "energy": self._saved_energy}
+
+    def _has_changes(self, flush_energy: bool) -> bool:
+        """Whether the controller state changed, or the energy totals did and are due to be saved.
+
+        Energy totals move with nearly every reading while the unit runs, so on
+        their own they are only written every ENERGY_SAVE_INTERVAL, or when
+        flush_energy asks for it.
+        """
+        if self._persistent_data() != self._saved_data:
+            return True
+        if not flush_energy and dt_util.utcnow().timestamp() < self._energy_save_due:
+            return False
+        return self.energy.as_dict() != self._saved_energy
+
+    @callback
+    def async_schedule_save(self, flush_energy: bool = False):
+        """Queue one delayed write if any persisted field changed since the last write.
+
+        Unchanged cycles and changes made while a write is already queued are counted
+        in metrics.store_writes_skipped; the queued write picks up the latest values.
+        """
+        if self._save_pending or not self._has_changes(flush_energy):
+            self.metrics.store_writes_skipped += 1
+            return
+        self._save_pending = True
+        self.storage.async_delay_save(self._persistent_data_for_write, STORE_SAVE_DELAY)
 
     async def save_persistent_data(self):
-        await self.storage.async_save({
-            "last_auto_on": self._last_auto_on.isoformat() if self._last_auto_on else None,
-            "power_low_since": self._power_low_since.isoformat() if self._power_low_since else None,
-            "manual_override": self._manual_override,
-            "last_switch_state": self._last_switch_state,
-            "is_full_latched": self._is_full_latched,
-        })
+        """Write pending changes, energy totals included, immediately (used on unload)."""
+        if not self._save_pending and not self._has_changes(True):
+            return
+        await self.storage.async_save(self._persistent_data_for_write())
 
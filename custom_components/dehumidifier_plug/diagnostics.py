@@ -0,0 +1,57 @@
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return what one dehumidifier is doing and what it has cost so far."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    actuator = coordinator.actuator
+    state = coordinator.engine_state
+
+    return {
+        "config": {**entry.data, **entry.options},
+        "data": coordinator.data,
+        "last_update_success": coordinator.last_update_success,
+        "engine_state": {
+            "last_auto_on": state.last_auto_on,
+            "power_low_since": state.power_low_since,
+            "manual_override": state.manual_override,
+            "last_switch_state": state.last_switch_state,
+            "is_full_latched": state.is_full_latched,
+            "switched_at": state.switched_at,
+        },
+        "power": {
+            "statistic": coordinator.power_stats.statistic,
+            "samples": coordinator.power_stats.count,
+            "value": coordinator.power_stats.value,
+            "median": coordinator.power_stats.median,
+            "ewma": coordinator.power_stats.ewma,
+            "below_since": coordinator.power_stats.below_since,
+        },
+        "humidity": coordinator.humidity.as_dict(),
+        "trend": coordinator.trend.as_dict(dt_util.utcnow().timestamp()),
+        "price_plan": coordinator.price_plan.as_dict() if coordinator.price_plan else None,
+        "circuit": coordinator.circuit.as_dict() if coordinator.circuit else None,
+        "energy": {
+            "day_start": coordinator.energy.day_start,
+            "today": coordinator.energy.today,
+            "lifetime": coordinator.energy.lifetime,
+        },
+        "metrics": coordinator.metrics.as_dict(),
+        "trace": coordinator.trace.as_list(),
+        "transitions": await coordinator.async_read_transitions(100),
+        "transition_log_bytes": await hass.async_add_executor_job(coordinator.transition_log.size),
+        "switch_commands": {
+            "in_flight": actuator.in_flight,
+            "sent": actuator.commands_sent,
+            "deduplicated": actuator.commands_deduplicated,
+            "failed": actuator.commands_failed,
+            "retries": actuator.retries,
+            "latency": actuator.latency.as_dict(),
+        },
+    }
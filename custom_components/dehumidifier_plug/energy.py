@@ -0,0 +1,77 @@
+"""Running energy, runtime, cycle and tank-full totals for one dehumidifier.
+
+Times are UTC epoch seconds; the caller passes the start of the current local
+day so daily totals roll over at local midnight.
+"""
+
+# Index of each total in the today/lifetime lists
+KWH = 0
+ON_SECONDS = 1
+CYCLES = 2
+FULL_COUNT = 3
+
+
+class EnergyCounter:
+    """Integrates power readings (trapezoidal rule) and counts cycles, O(1) per sample."""
+
+    __slots__ = ("today", "lifetime", "day_start", "_last_time", "_last_power", "_last_on")
+
+    def __init__(self):
+        self.today = [0.0, 0.0, 0, 0]
+        self.lifetime = [0.0, 0.0, 0, 0]
+        self.day_start = None
+        self._last_time = None
+        self._last_power = None
+        self._last_on = None
+
+    def add(self, now: float, power: float, is_on: bool, day_start: float):
+        """Account for the time since the previous reading and record this one."""
+        if day_start != self.day_start:
+            self.today = [0.0, 0.0, 0, 0]
+            self.day_start = day_start
+
+        if self._last_time is not None and now > self._last_time:
+            elapsed = now - self._last_time
+            kwh = (self._last_power + power) / 2 * elapsed / 3_600_000
+            on_seconds = elapsed if self._last_on else 0.0
+            # Only the part after midnight belongs to today
+            share = min(now - day_start, elapsed) / elapsed if now > day_start else 0.0
+            self.lifetime[KWH] += kwh
+            self.lifetime[ON_SECONDS] += on_seconds
+            self.today[KWH] += kwh * share
+            self.today[ON_SECONDS] += on_seconds * share
+
+        if is_on and self._last_on is False:
+            self.lifetime[CYCLES] += 1
+            self.today[CYCLES] += 1
+        self._last_time = max(now, self._last_time or now)
+        self._last_power = power
+        self._last_on = is_on
+
+    def count_full(self):
+        self.lifetime[FULL_COUNT] += 1
+        self.today[FULL_COUNT] += 1
+
+    def as_dict(self) -> dict:
+        """Compact form for the store, rounded to what is worth keeping."""
+        return {
+            "day_start": self.day_start,
+            "today": _compact(self.today),
+            "lifetime": _compact(self.lifetime),
+        }
+
+    def restore(self, data: dict):
+        """Load totals saved with as_dict(); the next reading starts a new interval."""
+        self.day_start = data.get("day_start")
+        self.today = _expand(data.get("today"))
+        self.lifetime = _expand(data.get("lifetime"))
+
+
+def _compact(totals: list) -> list:
+    return [round(totals[KWH], 2), round(totals[ON_SECONDS] / 300) * 300, totals[CYCLES], totals[FULL_COUNT]]
+
+
+def _expand(values: list | None) -> list:
+    if not values or len(values) != 4:
+        return [0.0, 0.0, 0, 0]
+    return [float(values[KWH]), float(values[ON_SECONDS]), int(values[CYCLES]), int(values[FULL_COUNT])]
@@ -0,0 +1,334 @@
+"""Side-effect-free control logic for a plug-controlled dehumidifier.
+
+This module deliberately imports nothing from Home Assistant or from the rest of
+the integration, so it can be loaded on its own (e.g. by offline tools) and
+called in tight loops. The coordinator reads entity states into an
+EngineInput, calls evaluate() and carries out the returned actions.
+
+The same holds for the modules the coordinator keeps its bookkeeping in:
+schedule, analytics, metrics, energy, trace, humidity, trend, pricing and
+translog. Anything touching hass lives in the coordinator and its helpers.
+"""
+
+ACTION_TURN_ON = "turn_on"
+ACTION_TURN_OFF = "turn_off"
+
+# Reason codes explaining the outcome of one evaluation
+REASON_NONE = "none"
+REASON_AUTO_DISABLED = "auto_disabled"
+REASON_HUMIDITY_HIGH = "humidity_high"
+REASON_HUMIDITY_LOW = "humidity_low"
+REASON_OUTSIDE_SCHEDULE = "outside_schedule"
+REASON_OUTSIDE_SCHEDULE_HUMIDITY_LOW = "outside_schedule_humidity_low"
+REASON_HOLD_MANUAL_OVERRIDE = "hold_manual_override"
+REASON_HOLD_FULL = "hold_full"
+REASON_WAIT_CIRCUIT = "wait_circuit"
+REASON_HOLD_MIN_ON = "hold_min_on"
+REASON_HOLD_MIN_OFF = "hold_min_off"
+REASON_HOLD_TREND = "hold_trend"
+
+# Position is the reason's code in the transition log: only ever append
+REASONS = (
+    REASON_NONE,
+    REASON_AUTO_DISABLED,
+    REASON_HUMIDITY_HIGH,
+    REASON_HUMIDITY_LOW,
+    REASON_OUTSIDE_SCHEDULE,
+    REASON_OUTSIDE_SCHEDULE_HUMIDITY_LOW,
+    REASON_HOLD_MANUAL_OVERRIDE,
+    REASON_HOLD_FULL,
+    REASON_WAIT_CIRCUIT,
+    REASON_HOLD_MIN_ON,
+    REASON_HOLD_MIN_OFF,
+    REASON_HOLD_TREND,
+)
+
+STATE_ON = "on"
+STATE_OFF = "off"
+
+
+class EngineConfig:
+    """Thresholds the engine decides on.
+
+    min_on_time and min_off_time are the shortest run and rest, in seconds, that
+    humidity alone may cut short; 0 disables them.
+    """
+
+    __slots__ = ("humidity_on", "humidity_off", "full_power_threshold", "full_delay", "min_on_time", "min_off_time")
+
+    def __init__(
+        self,
+        humidity_on: float,
+        humidity_off: float,
+        full_power_threshold: float,
+        full_delay: float,
+        min_on_time: float = 0,
+        min_off_time: float = 0,
+    ):
+        self.humidity_on = humidity_on
+        self.humidity_off = humidity_off
+        self.full_power_threshold = full_power_threshold
+        self.full_delay = full_delay
+        self.min_on_time = min_on_time
+        self.min_off_time = min_off_time
+
+
+class EngineInput:
+    """Snapshot of everything one evaluation looks at. Times are UTC epoch seconds.
+
+    commanded_on tells the engine that a turn_on it asked for earlier is still in
+    flight or has just been confirmed, so the plug switching on is not mistaken
+    for a manual override. power_low_since, when known, is the time power first
+    read below the full threshold; without it the dwell starts at this evaluation.
+    start_allowed False holds back a turn_on that would otherwise be issued, e.g.
+    while the unit waits for its turn on a shared circuit. humidity_slope is the
+    current humidity trend in percentage points per second, None when unknown.
+    """
+
+    __slots__ = (
+        "now",
+        "switch_state",
+        "power",
+        "humidity",
+        "auto_enabled",
+        "inside_schedule",
+        "commanded_on",
+        "power_low_since",
+        "start_allowed",
+        "humidity_slope",
+    )
+
+    def __init__(
+        self,
+        now: float,
+        switch_state: str,
+        power: float,
+        humidity: float,
+        auto_enabled: bool,
+        inside_schedule: bool,
+        commanded_on: bool = False,
+        power_low_since: float | None = None,
+        start_allowed: bool = True,
+        humidity_slope: float | None = None,
+    ):
+        self.now = now
+        self.switch_state = switch_state
+        self.power = power
+        self.humidity = humidity
+        self.auto_enabled = auto_enabled
+        self.inside_schedule = inside_schedule
+        self.commanded_on = commanded_on
+        self.power_low_since = power_low_since
+        self.start_allowed = start_allowed
+        self.humidity_slope = humidity_slope
+
+
+class EngineState:
+    """Controller state carried from one evaluation to the next. Times are UTC epoch seconds."""
+
+    __slots__ = (
+        "last_auto_on",
+        "power_low_since",
+        "manual_override",
+        "last_switch_state",
+        "is_full_latched",
+        "auto_turning_on",
+        "switched_at",
+    )
+
+    def __init__(
+        self,
+        last_auto_on: float | None = None,
+        power_low_since: float | None = None,
+        manual_override: bool = False,
+        last_switch_state: str | None = None,
+        is_full_latched: bool = False,
+        auto_turning_on: bool = False,
+        switched_at: float | None = None,
+    ):
+        self.last_auto_on = last_auto_on
+        self.power_low_since = power_low_since
+        self.manual_override = manual_override
+        self.last_switch_state = last_switch_state
+        self.is_full_latched = is_full_latched
+        self.auto_turning_on = auto_turning_on
+        self.switched_at = switched_at
+
+    def copy(self) -> "EngineState":
+        return EngineState(
+            self.last_auto_on,
+            self.power_low_since,
+            self.manual_override,
+            self.last_switch_state,
+            self.is_full_latched,
+            self.auto_turning_on,
+            self.switched_at,
+        )
+
+
+class Decision:
+    """Result of one evaluation: the new state, intended actions and derived flags."""
+
+    __slots__ = ("state", "actions", "reason", "is_on", "is_full", "humidity_low", "humidity_high", "inside_schedule")
+
+    def __init__(self, state, actions, reason, is_on, is_full, humidity_low, humidity_high, inside_schedule):
+        self.state = state
+        self.actions = actions
+        self.reason = reason
+        self.is_on = is_on
+        self.is_full = is_full
+        self.humidity_low = humidity_low
+        self.humidity_high = humidity_high
+        self.inside_schedule = inside_schedule
+
+    def as_dict(self) -> dict:
+        """The coordinator data dict consumed by the entities."""
+        return {
+            "is_on": self.is_on,
+            "is_full": self.is_full,
+            "inside_schedule": self.inside_schedule,
+            "humidity_low": self.humidity_low,
+            "humidity_high": self.humidity_high,
+            "manual_override": self.state.manual_override,
+            "waiting_for_circuit": self.reason == REASON_WAIT_CIRCUIT,
+        }
+
+
+def inside_window(start: int, end: int, now: float) -> bool:
+    """Whether now falls in the daily window [start, end], all in seconds since midnight.
+
+    Windows with end before start run across midnight.
+    """
+    if start < end:
+        return start <= now <= end
+    return now >= start or now <= end
+
+
+def evaluate(config: EngineConfig, inp: EngineInput, state: EngineState) -> Decision:
+    """Decide what to do for one snapshot. The given state is not modified."""
+    new = state.copy()
+    now = inp.now
+    is_on = inp.switch_state == STATE_ON
+    humidity_low = inp.humidity < config.humidity_off
+    humidity_high = inp.humidity > config.humidity_on
+
+    # Manual override detection: the plug changed state without us asking for it
+    previous_state = new.last_switch_state
+    new.last_switch_state = inp.switch_state
+    if previous_state is not None and previous_state != inp.switch_state:
+        new.switched_at = now
+        if is_on and not (new.auto_turning_on or inp.commanded_on):
+            new.manual_override = True
+        elif inp.switch_state == STATE_OFF:
+            new.manual_override = False
+
+    # Full detection: power has to stay below the threshold for full_delay seconds, then latches
+    if is_on and inp.power < config.full_power_threshold:
+        if new.power_low_since is None:
+            new.power_low_since = inp.power_low_since if inp.power_low_since is not None else now
+    else:
+        new.power_low_since = None
+        new.is_full_latched = False
+
+    if new.power_low_since is not None and now - new.power_low_since >= config.full_delay:
+        new.is_full_latched = True
+    is_full = new.is_full_latched
+
+    actions = []
+    reason = REASON_AUTO_DISABLED
+    if inp.auto_enabled:
+        new.auto_turning_on = False
+        reason = REASON_NONE
+        if inp.inside_schedule:
+            if humidity_high and not is_full and not is_on:
+                reason = _start_hold(config, inp, new)
+                if reason is None:
+                    actions.append(ACTION_TURN_ON)
+                    reason = REASON_HUMIDITY_HIGH
+                    new.auto_turning_on = True
+                    new.last_auto_on = now
+                    new.manual_override = False
+            elif humidity_low and is_on:
+                if _dwelling(new.switched_at, config.min_on_time, now):
+                    reason = REASON_HOLD_MIN_ON
+                else:
+                    actions.append(ACTION_TURN_OFF)
+                    reason = REASON_HUMIDITY_LOW
+                    new.manual_override = False
+        elif is_on:
+            if humidity_low:
+                actions.append(ACTION_TURN_OFF)
+                reason = REASON_OUTSIDE_SCHEDULE_HUMIDITY_LOW
+                new.manual_override = False
+            elif new.manual_override:
+                reason = REASON_HOLD_MANUAL_OVERRIDE
+            elif is_full:
+                reason = REASON_HOLD_FULL
+            else:
+                actions.append(ACTION_TURN_OFF)
+                reason = REASON_OUTSIDE_SCHEDULE
+
+    return Decision(new, actions, reason, is_on, is_full, humidity_low, humidity_high, inp.inside_schedule)
+
+
+def _dwelling(since: float | None, minimum: float, now: float) -> bool:
+    return since is not None and now - since < minimum
+
+
+def _start_hold(config: EngineConfig, inp: EngineInput, state: EngineState) -> str | None:
+    """Why a turn_on that humidity asks for is held back, None if it may go ahead."""
+    if _dwelling(state.switched_at, config.min_off_time, inp.now):
+        return REASON_HOLD_MIN_OFF
+    # Humidity already falling back under the start threshold sooner than the
+    # shortest run: the unit would only be switched off again right after
+    slope = inp.humidity_slope
+    if config.min_on_time and slope is not None and slope < 0 and (inp.humidity - config.humidity_on) / -slope < config.min_on_time:
+        return REASON_HOLD_TREND
+    if not inp.start_allowed:
+        return REASON_WAIT_CIRCUIT
+    return None
+
+
+def hold_until(config: EngineConfig, decision: Decision) -> float | None:
+    """When the minimum on or off time holding this decision runs out, None if none does."""
+    if decision.reason == REASON_HOLD_MIN_ON:
+        return decision.state.switched_at + config.min_on_time
+    if decision.reason == REASON_HOLD_MIN_OFF:
+        return decision.state.switched_at + config.min_off_time
+    return None
+
+
+def refresh_interval(
+    config: EngineConfig,
+    inp: EngineInput,
+    decision: Decision,
+    minimum: float,
+    maximum: float,
+    default: float,
+    humidity_margin: float = 2.0,
+) -> float:
+    """Seconds until the next evaluation is worth doing, between minimum and maximum.
+
+    While power is low, or a minimum on or off time holds the plug, the next
+    evaluation is timed for the moment that runs out. Near the threshold that can
+    flip the plug it is fast. While the plug is off with nothing about to happen,
+    or outside the schedule, whose edges are timed separately, it is slow.
+    """
+    state = decision.state
+    if decision.actions:
+        # Look again soon to pick up the plug's new state
+        return minimum
+    if state.power_low_since is not None and not decision.is_full:
+        remaining = state.power_low_since + config.full_delay - inp.now
+        return min(max(remaining, minimum), maximum)
+    held_until = hold_until(config, decision)
+    if held_until is not None:
+        return min(max(held_until - inp.now, minimum), maximum)
+    if not inp.auto_enabled or not inp.inside_schedule:
+        return maximum
+    threshold = config.humidity_off if decision.is_on else config.humidity_on
+    if abs(inp.humidity - threshold) <= humidity_margin:
+        return minimum
+    if not decision.is_on:
+        return maximum
+    return min(max(default, minimum), maximum)
@@ -0,0 +1,171 @@
+import logging
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, Event, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from .const import DOMAIN, DATA_ENTITY_INDEX, CONF_SWITCH, CONF_POWER, CONF_HUMIDITY, CONF_EXTRA_HUMIDITY, CONF_PRICE_SENSOR
+from .models import DehumidifierConfig
+from .utils import slugify
+
+_LOGGER = logging.getLogger(__name__)
+
+ROLE_AUTO_SWITCH = "auto_switch"
+SOURCE_ROLES = (CONF_SWITCH, CONF_POWER, CONF_HUMIDITY)
+
+
+def auto_switch_unique_id(name: str) -> str:
+    """Unique id of the auto-control switch of the dehumidifier with this name."""
+    return f"dehumidifier_{slugify(f'{name}_control')}"
+
+
+class ResolvedEntities:
+    """Current entity ids and device of one dehumidifier, kept up to date by the EntityIndex.
+
+    auto_switch is None until the auto-control switch has been registered, and
+    price_sensor is None unless one is configured.
+    """
+
+    __slots__ = (
+        "switch_entity",
+        "power_sensor",
+        "humidity_sensor",
+        "extra_humidity_sensors",
+        "price_sensor",
+        "auto_switch",
+        "auto_switch_unique_id",
+        "device_identifiers",
+        "_listeners",
+    )
+
+    def __init__(self):
+        self.switch_entity = None
+        self.power_sensor = None
+        self.humidity_sensor = None
+        self.extra_humidity_sensors = []
+        self.price_sensor = None
+        self.auto_switch = None
+        self.auto_switch_unique_id = None
+        self.device_identifiers = None
+        self._listeners = []
+
+    @callback
+    def async_add_listener(self, listener: Callable[[str, str | None, str], None]) -> Callable[[], None]:
+        """Call listener(role, old_entity_id, new_entity_id) whenever a resolved entity id changes."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    @property
+    def humidity_sensors(self) -> list[str]:
+        return list(dict.fromkeys([self.humidity_sensor, *self.extra_humidity_sensors]))
+
+    @callback
+    def _async_set(self, role: str, entity_id: str | None):
+        old_entity_id = getattr(self, role)
+        if entity_id == old_entity_id:
+            return
+        setattr(self, role, entity_id)
+        for listener in list(self._listeners):
+            listener(role, old_entity_id, entity_id)
+
+    @callback
+    def _async_rename_extra_humidity(self, old_entity_id: str, entity_id: str):
+        self.extra_humidity_sensors = [entity_id if sensor == old_entity_id else sensor for sensor in self.extra_humidity_sensors]
+        for listener in list(self._listeners):
+            listener(CONF_EXTRA_HUMIDITY, old_entity_id, entity_id)
+
+
+class EntityIndex:
+    """Resolves the entities each dehumidifier refers to once, then follows registry changes.
+
+    Entity ids are looked up when an entry is set up and updated from
+    entity_registry_updated events, so a rename takes effect right away and
+    nothing is looked up or rebuilt on the refresh path.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._records = {}
+        self._unsub_registry = None
+
+    @staticmethod
+    @callback
+    def async_get(hass: HomeAssistant) -> "EntityIndex":
+        """Return the index for this Home Assistant instance, creating it if needed."""
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        if DATA_ENTITY_INDEX not in domain_data:
+            domain_data[DATA_ENTITY_INDEX] = EntityIndex(hass)
+        return domain_data[DATA_ENTITY_INDEX]
+
+    @callback
+    def async_resolve(self, key: str, config: DehumidifierConfig) -> ResolvedEntities:
+        """Resolve the entities of one dehumidifier and keep them current until released."""
+        registry = er.async_get(self.hass)
+        record = ResolvedEntities()
+        record.switch_entity = config.switch_entity
+        record.power_sensor = config.power_sensor
+        record.humidity_sensor = config.humidity_sensor
+        record.extra_humidity_sensors = list(config.extra_humidity_sensors)
+        record.price_sensor = config.price_sensor or None
+        record.auto_switch_unique_id = auto_switch_unique_id(config.name)
+        record.auto_switch = registry.async_get_entity_id("switch", DOMAIN, record.auto_switch_unique_id)
+        record.device_identifiers = self._device_identifiers(registry, record)
+
+        self._records[key] = record
+        if self._unsub_registry is None:
+            self._unsub_registry = self.hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated
+            )
+        return record
+
+    @callback
+    def async_release(self, key: str):
+        self._records.pop(key, None)
+        if not self._records and self._unsub_registry:
+            self._unsub_registry()
+            self._unsub_registry = None
+            self.hass.data.get(DOMAIN, {}).pop(DATA_ENTITY_INDEX, None)
+
+    def _device_identifiers(self, registry: er.EntityRegistry, record: ResolvedEntities):
+        """Identifiers of the device of the plug switch, or else of the power sensor."""
+        device_registry = dr.async_get(self.hass)
+        for entity_id in (record.switch_entity, record.power_sensor):
+            entity_entry = registry.async_get(entity_id)
+            device_entry = device_registry.async_get(entity_entry.device_id) if entity_entry and entity_entry.device_id else None
+            if device_entry:
+                return device_entry.identifiers
+        return None
+
+    @callback
+    def _async_registry_updated(self, event: Event):
+        action = event.data["action"]
+        entity_id = event.data["entity_id"]
+        registry = er.async_get(self.hass)
+
+        if action == "create":
+            entry = registry.async_get(entity_id)
+            if not entry or entry.platform != DOMAIN:
+                return
+            for record in self._records.values():
+                if record.auto_switch_unique_id == entry.unique_id:
+                    record._async_set(ROLE_AUTO_SWITCH, entity_id)
+            return
+
+        if action == "remove":
+            for record in self._records.values():
+                if record.auto_switch == entity_id:
+                    record._async_set(ROLE_AUTO_SWITCH, None)
+            return
+
+        old_entity_id = event.data.get("old_entity_id")
+        changes = event.data.get("changes", {})
+        for record in self._records.values():
+            for role in (*SOURCE_ROLES, CONF_PRICE_SENSOR, ROLE_AUTO_SWITCH):
+                if old_entity_id and getattr(record, role) == old_entity_id:
+                    _LOGGER.debug(f"{role} renamed from {old_entity_id} to {entity_id}")
+                    record._async_set(role, entity_id)
+            if old_entity_id and old_entity_id in record.extra_humidity_sensors:
+                _LOGGER.debug(f"{CONF_EXTRA_HUMIDITY} renamed from {old_entity_id} to {entity_id}")
+                record._async_rename_extra_humidity(old_entity_id, entity_id)
+            if "device_id" in changes and entity_id in (record.switch_entity, record.power_sensor):
+                record.device_identifiers = self._device_identifiers(registry, record)
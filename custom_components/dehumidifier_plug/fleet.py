@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DATA_FLEET, FLEET_STORAGE_KEY, FLEET_TICK_INTERVAL, STORE_SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DehumidifierFleet:
+    """Shared engine for every config entry running in fleet mode.
+
+    One timer refreshes, in a single pass, every member coordinator whose adaptive
+    refresh interval has elapsed, and one Store file holds a record per device
+    instead of one file per config entry.
+    """
+
+    def __init__(self, hass: HomeAssistant, update_interval: timedelta = timedelta(seconds=FLEET_TICK_INTERVAL)):
+        self.hass = hass
+        self.store = Store(hass, 1, FLEET_STORAGE_KEY)
+        self.update_interval = update_interval
+        self._members = {}
+        self._records = None
+        self._load_task = None
+        self._pending = {}
+        self._unsub_interval = None
+        self._ticking = False
+        self.store_writes = 0
+
+    @staticmethod
+    @callback
+    def async_get(hass: HomeAssistant) -> "DehumidifierFleet":
+        """Return the fleet for this Home Assistant instance, creating it if needed."""
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        if DATA_FLEET not in domain_data:
+            domain_data[DATA_FLEET] = DehumidifierFleet(hass)
+        return domain_data[DATA_FLEET]
+
+    def storage_view(self, key: str, legacy_key: str | None = None) -> "FleetStoreView":
+        """Return a Store-like handle for one device record.
+
+        legacy_key names the per-entry store used before the entry joined the fleet;
+        when the fleet has no record for the device yet, its record is moved
+        into the fleet store and the old file removed.
+        """
+        return FleetStoreView(self, key, legacy_key)
+
+    @callback
+    def async_add_member(self, key: str, coordinator):
+        self._members[key] = coordinator
+        if self._unsub_interval is None:
+            self._unsub_interval = async_track_time_interval(
+                self.hass, self._async_tick, self.update_interval, name="Dehumidifier fleet"
+            )
+
+    async def async_remove_member(self, key: str):
+        """Drop a member; the last one out stops the timer and flushes the store."""
+        self._members.pop(key, None)
+        if self._members:
+            return
+        if self._unsub_interval:
+            self._unsub_interval()
+            self._unsub_interval = None
+        if self._pending and self._records is not None:
+            await self.store.async_save(self._data_to_save())
+        self.hass.data.get(DOMAIN, {}).pop(DATA_FLEET, None)
+
+    async def _async_tick(self, _now):
+        if self._ticking:
+            # A slow switch call is still holding up the previous pass; its due members go next tick
+            return
+        # Members in event-driven mode refresh themselves; everyone else is evaluated here once due.
+        # Half a tick of slack so a member is not pushed back a whole tick by jitter
+        due_by = self.hass.loop.time() + FLEET_TICK_INTERVAL / 2
+        due = [
+            coordinator
+            for coordinator in self._members.values()
+            if not coordinator.config.event_driven and coordinator.next_refresh <= due_by
+        ]
+        if not due:
+            return
+        self._ticking = True
+        try:
+            await asyncio.gather(*(coordinator.async_refresh() for coordinator in due))
+        finally:
+            self._ticking = False
+
+    async def async_load_records(self) -> dict:
+        """Load the consolidated store once, however many members ask for it."""
+        if self._records is not None:
+            return self._records
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self.store.async_load())
+        data = await asyncio.shield(self._load_task)
+        if self._records is None:
+            self._records = dict((data or {}).get("devices", {}))
+            if self._pending:
+                self.store.async_delay_save(self._data_to_save, STORE_SAVE_DELAY)
+        return self._records
+
+    @callback
+    def async_delay_save(self, key: str, data_func, delay: float):
+        self._pending[key] = data_func
+        # Never write before the existing records are loaded, or they would be lost
+        if self._records is not None:
+            self.store.async_delay_save(self._data_to_save, delay)
+
+    async def async_save(self, key: str, data: dict):
+        self._pending.pop(key, None)
+        await self.async_load_records()
+        self._records[key] = data
+        await self.store.async_save(self._data_to_save())
+
+    async def async_remove_record(self, key: str):
+        self._pending.pop(key, None)
+        records = await self.async_load_records()
+        if records.pop(key, None) is not None:
+            await self.store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict:
+        """Collect pending member records; called by the Store at write time."""
+        self.store_writes += 1
+        pending, self._pending = self._pending, {}
+        for key, data_func in pending.items():
+            self._records[key] = data_func()
+        return {"devices": self._records}
+
+
+class FleetStoreView:
+    """Implements the part of the Store interface the coordinator uses, for one fleet record."""
+
+    def __init__(self, fleet: DehumidifierFleet, key: str, legacy_key: str | None = None):
+        self._fleet = fleet
+        self.key = key
+        self._legacy_key = legacy_key
+
+    async def async_load(self):
+        records = await self._fleet.async_load_records()
+        data = records.get(self.key)
+        if data is None and self._legacy_key:
+            legacy = Store(self._fleet.hass, 1, self._legacy_key)
+            data = await legacy.async_load()
+            if data is not None:
+                # Move the record into the fleet store so the old file can go
+                await self._fleet.async_save(self.key, data)
+                await legacy.async_remove()
+        return data
+
+    @callback
+    def async_delay_save(self, data_func, delay: float = 0):
+        self._fleet.async_delay_save(self.key, data_func, delay)
+
+    async def async_save(self, data: dict):
+        await self._fleet.async_save(self.key, data)
@@ -0,0 +1,145 @@
+"""Aggregate of several humidity sensors, updated one reading at a time.
+
+Times are UTC epoch seconds.
+"""
+
+AGGREGATION_MEAN = "mean"
+AGGREGATION_MAX = "max"
+AGGREGATION_MIN = "min"
+AGGREGATION_WEIGHTED = "weighted"
+
+AGGREGATIONS = (AGGREGATION_MEAN, AGGREGATION_MAX, AGGREGATION_MIN, AGGREGATION_WEIGHTED)
+
+
+def parse_weights(text: str, count: int) -> list[float]:
+    """Parse comma-separated weights; missing ones default to 1. Raises ValueError."""
+    weights = [float(part) for part in text.replace(";", ",").split(",") if part.strip()] if text else []
+    if len(weights) > count or any(weight < 0 for weight in weights):
+        raise ValueError("Expected at most one non-negative weight per humidity sensor")
+    return weights + [1.0] * (count - len(weights))
+
+
+class HumidityAggregate:
+    """Mean, max, min or weighted mean over the sensors that currently have a usable reading.
+
+    Running sums make a reading O(1) for the means; max and min rescan the few
+    current readings only when the extreme itself changes or drops out. A
+    reading older than max_age seconds (0 for no limit) no longer counts.
+    """
+
+    __slots__ = (
+        "mode",
+        "max_age",
+        "weights",
+        "values",
+        "times",
+        "_index",
+        "_sum",
+        "_weight",
+        "_count",
+        "_extreme",
+        "_expires",
+    )
+
+    def __init__(self, sensors: list[str], mode: str = AGGREGATION_MEAN, weights: list[float] | None = None, max_age: float = 0):
+        self.mode = mode
+        self.max_age = max_age
+        self._index = {sensor: index for index, sensor in enumerate(sensors)}
+        self.weights = list(weights) if mode == AGGREGATION_WEIGHTED and weights else [1.0] * len(sensors)
+        self.values = [None] * len(sensors)
+        self.times = [None] * len(sensors)
+        self._sum = 0.0
+        self._weight = 0.0
+        self._count = 0
+        self._extreme = None
+        self._expires = None
+
+    @property
+    def sensors(self) -> list[str]:
+        return list(self._index)
+
+    @property
+    def count(self) -> int:
+        """Sensors with a usable reading."""
+        return self._count
+
+    def rename(self, old: str, new: str):
+        if old in self._index:
+            self._index = {new if sensor == old else sensor: index for sensor, index in self._index.items()}
+
+    def has_reading(self, sensor: str) -> bool:
+        index = self._index.get(sensor)
+        return index is not None and self.values[index] is not None
+
+    def update(self, sensor: str, value: float | None, timestamp: float | None):
+        """Record a sensor's new reading; None marks it unavailable."""
+        index = self._index.get(sensor)
+        if index is None:
+            return
+        self._drop(index)
+        if value is None:
+            return
+        self.values[index] = value
+        self.times[index] = timestamp
+        self._sum += value * self.weights[index]
+        self._weight += self.weights[index]
+        self._count += 1
+        if self._extreme is not None and (
+            (self.mode == AGGREGATION_MAX and value > self._extreme) or (self.mode == AGGREGATION_MIN and value < self._extreme)
+        ):
+            self._extreme = value
+        elif self._count == 1:
+            self._extreme = value
+        if self.max_age and timestamp is not None and (self._expires is None or timestamp + self.max_age < self._expires):
+            self._expires = timestamp + self.max_age
+
+    def value(self, now: float) -> float | None:
+        """Current aggregate, None when no sensor has a usable reading."""
+        if self._expires is not None and now >= self._expires:
+            self._expire(now)
+        if not self._count:
+            return None
+        if self.mode in (AGGREGATION_MAX, AGGREGATION_MIN):
+            if self._extreme is None:
+                present = [value for value in self.values if value is not None]
+                self._extreme = max(present) if self.mode == AGGREGATION_MAX else min(present)
+            return self._extreme
+        if not self._weight:
+            return None
+        return self._sum / self._weight
+
+    def as_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "max_age": self.max_age,
+            "sensors": {
+                sensor: {"value": self.values[index], "time": self.times[index], "weight": self.weights[index]}
+                for sensor, index in self._index.items()
+            },
+        }
+
+    def _drop(self, index: int):
+        value = self.values[index]
+        if value is None:
+            return
+        self.values[index] = None
+        self.times[index] = None
+        self._sum -= value * self.weights[index]
+        self._weight -= self.weights[index]
+        self._count -= 1
+        if not self._count:
+            # Start the running sums afresh so rounding errors cannot accumulate
+            self._sum = 0.0
+            self._weight = 0.0
+        if value == self._extreme:
+            self._extreme = None
+
+    def _expire(self, now: float):
+        self._expires = None
+        for index, timestamp in enumerate(self.times):
+            if timestamp is None:
+                continue
+            if timestamp + self.max_age <= now:
+                self._drop(index)
+            elif self._expires is None or timestamp + self.max_age < self._expires:
+                self._expires = timestamp + self.max_age
@@ -0,0 +1,103 @@
+"""Lightweight counters and latency histograms kept per coordinator.
+
+Everything here is plain Python with fixed memory, cheap enough to update on
+every refresh and every service call.
+"""
+
+from bisect import bisect_left
+
+# Upper bucket bounds in milliseconds; the last bucket catches everything above
+LATENCY_BUCKETS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in milliseconds."""
+
+    __slots__ = ("bounds", "buckets", "count", "total", "max", "last")
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self.last = None
+
+    def record(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-th quantile (the maximum for the top bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "last_ms": _round(self.last),
+            "mean_ms": _round(self.mean),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": _round(self.max),
+            "buckets": dict(zip([f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"], self.buckets)),
+        }
+
+
+class CoordinatorMetrics:
+    """What one dehumidifier's control loop has cost so far."""
+
+    __slots__ = (
+        "updates",
+        "updates_failed",
+        "refreshes_coalesced",
+        "state_read_misses",
+        "store_writes",
+        "store_writes_skipped",
+        "update_duration",
+        "setup_duration",
+        "price_plans",
+    )
+
+    def __init__(self):
+        self.updates = 0
+        self.updates_failed = 0
+        self.refreshes_coalesced = 0
+        self.state_read_misses = 0
+        self.store_writes = 0
+        self.store_writes_skipped = 0
+        self.update_duration = Histogram()
+        self.setup_duration = None
+        self.price_plans = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "updates": self.updates,
+            "updates_failed": self.updates_failed,
+            "refreshes_coalesced": self.refreshes_coalesced,
+            "state_read_misses": self.state_read_misses,
+            "store_writes": self.store_writes,
+            "store_writes_skipped": self.store_writes_skipped,
+            "update_duration": self.update_duration.as_dict(),
+            "setup_ms": _round(self.setup_duration),
+            "price_plans": self.price_plans,
+        }
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
@@ -1,5 +1,5 @@
 from datetime import datetime, time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class DehumidifierConfig:
@@ -13,6 +13,30 @@ class DehumidifierConfig:
     humidity_off_threshold: float
     start_time: time
     end_time: time
+    event_driven: bool = False
+    fleet_mode: bool = False
+    schedule: str = ""
+    full_dwell: float = 60
+    power_statistic: str = "sample"
+    min_refresh_interval: float = 10
+    max_refresh_interval: float = 300
+    extra_humidity_sensors: list[str] = field(default_factory=list)
+    humidity_aggregation: str = "mean"
+    humidity_weights: str = ""
+    humidity_max_age: float = 0
+    circuit: str = ""
+    circuit_budget: float = 0
+    min_on_time: float = 0
+    min_off_time: float = 0
+    price_sensor: str = ""
+    price_runtime: float = 6
+    price_block: float = 60
+    fleet_status_sensor: bool = False
+
+    @property
+    def humidity_sensors(self) -> list[str]:
+        """The main humidity sensor followed by any additional ones, without duplicates."""
+        return list(dict.fromkeys([self.humidity_sensor, *self.extra_humidity_sensors]))
 
     @staticmethod
     def from_dict(data: dict) -> "DehumidifierConfig":
@@ -35,6 +59,25 @@ class DehumidifierConfig:
             humidity_off_threshold=float(data["humidity_off_threshold"]),
             start_time=ensure_time(data["start_time"]),
             end_time=ensure_time(data["end_time"]),
+            event_driven=bool(data.get("event_driven", False)),
+            fleet_mode=bool(data.get("fleet_mode", False)),
+            schedule=data.get("schedule") or "",
+            full_dwell=float(data.get("full_dwell", 60)),
+            power_statistic=data.get("power_statistic", "sample"),
+            min_refresh_interval=float(data.get("min_refresh_interval", 10)),
+            max_refresh_interval=float(data.get("max_refresh_interval", 300)),
+            extra_humidity_sensors=list(data.get("extra_humidity_sensors") or []),
+            humidity_aggregation=data.get("humidity_aggregation", "mean"),
+            humidity_weights=data.get("humidity_weights") or "",
+            humidity_max_age=float(data.get("humidity_max_age", 0)),
+            circuit=(data.get("circuit") or "").strip(),
+            circuit_budget=float(data.get("circuit_budget", 0)),
+            min_on_time=float(data.get("min_on_time", 0)),
+            min_off_time=float(data.get("min_off_time", 0)),
+            price_sensor=data.get("price_sensor") or "",
+            price_runtime=float(data.get("price_runtime", 6)),
+            price_block=float(data.get("price_block", 60)),
+            fleet_status_sensor=bool(data.get("fleet_status_sensor", False)),
         )
         
         
\ No newline at end of file
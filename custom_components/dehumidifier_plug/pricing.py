@@ -0,0 +1,243 @@
+"""Cheapest run windows from an electricity price forecast.
+
+Times are UTC epoch seconds. A forecast is read from the attributes of a price
+sensor, in any of the shapes the common tariff integrations use: lists of dicts
+with a start time, optionally an end time, and a price under keys such as
+
+    raw_today / raw_tomorrow: [{"start": ..., "end": ..., "value": 0.21}, ...]
+    today / tomorrow:         [{"startsAt": ..., "total": 0.21}, ...]
+    prices / forecast / data: [{"from": ..., "till": ..., "price": 0.21}, ...]
+
+The plan is computed once per forecast: for each day, the cheapest set of run
+blocks that adds up to the daily runtime. Block costs come from a sliding window
+over prefix sums, the choice of blocks from a small dynamic program, and the
+result is kept as a sorted edge list, so "is it a run window" and "when does
+that change" are a bisect.
+"""
+
+import math
+from bisect import bisect_right
+from collections.abc import Callable, Mapping
+from datetime import datetime, tzinfo
+
+_LIST_KEYS = ("raw_today", "raw_tomorrow", "prices_today", "prices_tomorrow", "today", "tomorrow", "prices", "forecast", "data", "rates")
+_START_KEYS = ("start", "startsAt", "starts_at", "start_time", "from", "valid_from", "time", "datetime")
+_END_KEYS = ("end", "endsAt", "ends_at", "end_time", "till", "to", "valid_to")
+_PRICE_KEYS = ("value", "price", "total", "value_inc_vat", "price_per_kwh", "electricity_price")
+
+DEFAULT_SLOT = 3600
+
+
+def _timestamp(value, tz: tzinfo | None) -> float | None:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None and tz is not None:
+            value = value.replace(tzinfo=tz)
+        return value.timestamp()
+    return None
+
+
+def _first(item: Mapping, keys: tuple[str, ...]):
+    for key in keys:
+        if key in item:
+            return item[key]
+    return None
+
+
+def parse_forecast(attributes: Mapping, tz: tzinfo | None = None) -> tuple[tuple[float, float, float], ...]:
+    """Price slots (start, end, price) found in a sensor's attributes, sorted by start.
+
+    Naive times are taken to be in tz. A slot without an end lasts until the next
+    one starts, or as long as the one before it.
+    """
+    starts = {}
+    for key in _LIST_KEYS:
+        items = attributes.get(key)
+        if not isinstance(items, (list, tuple)):
+            continue
+        for item in items:
+            if not isinstance(item, Mapping):
+                continue
+            start = _timestamp(_first(item, _START_KEYS), tz)
+            try:
+                price = float(_first(item, _PRICE_KEYS))
+            except (TypeError, ValueError):
+                continue
+            if start is None or math.isnan(price) or start in starts:
+                continue
+            starts[start] = (_timestamp(_first(item, _END_KEYS), tz), price)
+
+    slots = []
+    ordered = sorted(starts)
+    for index, start in enumerate(ordered):
+        end, price = starts[start]
+        if end is None or end <= start:
+            if index + 1 < len(ordered):
+                end = ordered[index + 1]
+            else:
+                end = start + (slots[-1][1] - slots[-1][0] if slots else DEFAULT_SLOT)
+        slots.append((start, end, price))
+    return tuple(slots)
+
+
+class PricePlan:
+    """Run windows chosen from one forecast, covering from its first to its last slot.
+
+    cost is the sum of price times hours over the windows, i.e. what they cost
+    per kW the unit draws.
+    """
+
+    __slots__ = ("_edges", "start", "end", "cost")
+
+    def __init__(self, windows: list[tuple[float, float]], start: float, end: float, cost: float):
+        edges = []
+        for window_start, window_end in sorted(windows):
+            if edges and window_start <= edges[-1]:
+                edges[-1] = max(edges[-1], window_end)
+            else:
+                edges.extend((window_start, window_end))
+        self._edges = edges
+        self.start = start
+        self.end = end
+        self.cost = cost
+
+    @property
+    def windows(self) -> list[tuple[float, float]]:
+        return list(zip(self._edges[::2], self._edges[1::2]))
+
+    def covers(self, now: float) -> bool:
+        return self.start <= now < self.end
+
+    def is_active(self, now: float) -> bool:
+        """Whether now falls in a run window."""
+        return bisect_right(self._edges, now) % 2 == 1
+
+    def next_transition(self, now: float) -> float:
+        """Next window start or end after now, or the end of the plan."""
+        index = bisect_right(self._edges, now)
+        return self._edges[index] if index < len(self._edges) else self.end
+
+    def as_dict(self) -> dict:
+        return {"start": self.start, "end": self.end, "cost": round(self.cost, 4), "windows": self.windows}
+
+    def next_window(self, now: float) -> tuple[float, float] | None:
+        """The run window now is in, or else the next one."""
+        index = bisect_right(self._edges, now)
+        if index % 2:
+            return self._edges[index - 1], self._edges[index]
+        if index < len(self._edges):
+            return self._edges[index], self._edges[index + 1]
+        return None
+
+
+def _resolution(slots) -> int:
+    """Longest slot length every slot is a whole multiple of (e.g. 900 for mixed hourly and 15 min)."""
+    step = 0
+    for start, end, _ in slots:
+        step = math.gcd(step, max(int(round(end - start)), 1))
+    return max(step, 60)
+
+
+def _cheapest_blocks(prices: list[float], contiguous: list[bool], blocks: int, length: int) -> list[int] | None:
+    """Start indexes of `blocks` non-overlapping runs of `length` slots with the lowest total price.
+
+    contiguous[i] tells whether slot i directly follows slot i - 1; a run cannot
+    span a gap. None if the blocks do not fit.
+    """
+    count = len(prices)
+    prefix = [0.0]
+    gaps = [0]
+    for index, price in enumerate(prices):
+        prefix.append(prefix[-1] + price)
+        gaps.append(gaps[-1] + (index > 0 and not contiguous[index]))
+    # Sliding window: cost of the run starting at each slot, inf where it would span a gap
+    run_cost = [
+        prefix[first + length] - prefix[first] if gaps[first + length] - gaps[first + 1] == 0 else math.inf
+        for first in range(count - length + 1)
+    ]
+
+    inf = math.inf
+    best = [[0.0] * (count + 1)] + [[inf] * (count + 1) for _ in range(blocks)]
+    taken = [[False] * (count + 1) for _ in range(blocks + 1)]
+    for block in range(1, blocks + 1):
+        previous, current, take = best[block - 1], best[block], taken[block]
+        for end in range(1, count + 1):
+            current[end] = current[end - 1]
+            if end >= length:
+                candidate = previous[end - length] + run_cost[end - length]
+                if candidate < current[end]:
+                    current[end] = candidate
+                    take[end] = True
+    if best[blocks][count] == inf:
+        return None
+
+    firsts = []
+    end = count
+    block = blocks
+    while block:
+        if taken[block][end]:
+            firsts.append(end - length)
+            end -= length
+            block -= 1
+        else:
+            end -= 1
+    return firsts
+
+
+def plan_cheapest(
+    slots,
+    runtime: float,
+    block: float,
+    day_of: Callable[[float], object],
+    now: float,
+    done_today: float = 0,
+) -> PricePlan | None:
+    """Cheapest run windows giving `runtime` seconds per day, in blocks of at least `block` seconds.
+
+    Slots that are over are left out; the day containing now only needs what is
+    left of its runtime after done_today seconds. Runtime is rounded up to whole
+    blocks. A day short of slots runs in all of them. None without future slots.
+    """
+    slots = [slot for slot in slots if slot[1] > now]
+    if not slots:
+        return None
+    step = _resolution(slots)
+
+    # Uniform slots, split per day as day_of sees it
+    days = {}
+    for start, end, price in slots:
+        for offset in range(int(round(end - start)) // step):
+            slot_start = start + offset * step
+            days.setdefault(day_of(slot_start), []).append((slot_start, price))
+
+    length = max(1, math.ceil(block / step))
+    today = day_of(now)
+    windows = []
+    cost = 0.0
+    for day, day_slots in days.items():
+        budget = runtime - (done_today if day == today else 0)
+        if budget <= 0:
+            continue
+        needed = math.ceil(budget / step)
+        starts = [start for start, _ in day_slots]
+        prices = [price for _, price in day_slots]
+        blocks = math.ceil(needed / length)
+        if blocks * length < len(day_slots):
+            contiguous = [index > 0 and starts[index] - starts[index - 1] == step for index in range(len(starts))]
+            firsts = _cheapest_blocks(prices, contiguous, blocks, length)
+            run = length
+            if firsts is None:
+                # Gaps leave no room for whole blocks: take the cheapest slots one by one
+                firsts, run = sorted(range(len(prices)), key=prices.__getitem__)[:needed], 1
+        else:
+            firsts, run = range(len(day_slots)), 1
+        for first in firsts:
+            windows.append((starts[first], starts[first + run - 1] + step))
+            cost += sum(prices[first:first + run]) * step / 3600
+    return PricePlan(windows, slots[0][0], slots[-1][1], cost)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DATA_RESTORE, CONF_FLEET_MODE
+from .fleet import DehumidifierFleet
+from .utils import slugify
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def entry_storage(hass: HomeAssistant, entry: ConfigEntry):
+    """Store (or fleet record) holding the persisted state of one config entry."""
+    legacy_key = f"{DOMAIN}_{slugify(entry.title)}"
+    if {**entry.data, **entry.options}.get(CONF_FLEET_MODE, False):
+        return DehumidifierFleet.async_get(hass).storage_view(entry.entry_id, legacy_key=legacy_key)
+    return Store(hass, 1, legacy_key)
+
+
+class RestoreCache:
+    """Saved state of every dehumidifier, read as soon as the integration starts.
+
+    The preload is started from async_setup, before any entry is set up: it starts
+    one load per entry store and awaits them concurrently (fleet members share the
+    single fleet store load), so an entry's file has usually been read by the time
+    its setup needs it. Each record is handed out once; later reloads read their
+    store directly.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._task = None
+
+    @staticmethod
+    @callback
+    def async_get(hass: HomeAssistant) -> "RestoreCache":
+        """Return the cache for this Home Assistant instance, creating it if needed."""
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        if DATA_RESTORE not in domain_data:
+            domain_data[DATA_RESTORE] = RestoreCache(hass)
+        return domain_data[DATA_RESTORE]
+
+    @callback
+    def async_preload(self):
+        """Start reading the state of every configured entry."""
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_load_all(), "dehumidifier_plug restore")
+
+    async def _async_load_all(self) -> dict:
+        entries = [entry for entry in self.hass.config_entries.async_entries(DOMAIN) if not entry.disabled_by]
+        results = await asyncio.gather(
+            *(entry_storage(self.hass, entry).async_load() for entry in entries), return_exceptions=True
+        )
+        records = {}
+        for entry, result in zip(entries, results):
+            # A store that failed to load is read again, and reported, by its own entry
+            if not isinstance(result, BaseException):
+                records[entry.entry_id] = result
+        return records
+
+    @staticmethod
+    async def async_load(hass: HomeAssistant, key: str, storage) -> dict | None:
+        """Saved state of one entry: the preloaded record if there is one, else read from storage."""
+        cache = hass.data.get(DOMAIN, {}).get(DATA_RESTORE)
+        if cache is not None and cache._task is not None:
+            records = await asyncio.shield(cache._task)
+            if key in records:
+                data = records.pop(key)
+                if not records:
+                    # Everything has been handed out; later reloads read their own store
+                    hass.data[DOMAIN].pop(DATA_RESTORE, None)
+                return data
+        return await storage.async_load()
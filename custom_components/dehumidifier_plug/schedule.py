@@ -0,0 +1,177 @@
+"""Weekly operating schedule with per-weekday windows and exception dates.
+
+A schedule is written one rule per line (or separated by ";"):
+
+    mon-fri 07:00-09:00, 17:00-22:30
+    sat,sun 09:00-23:00
+    daily 22:00-06:00
+    2026-12-24 10:00-14:00
+    2026-12-25 off
+
+Weekday rules add windows to the days they name; a window ending before it
+starts runs past midnight into the next day. A date rule replaces everything
+scheduled for that calendar day ("off" closes the whole day). Windows are
+half-open: active from their start up to, not including, their end. The
+start_time/end_time window of Schedule.daily() keeps its end inclusive.
+
+Rules are compiled once into a sorted list of edges per weekday plus one per
+exception date, so "is it active" and "when is the next change" are a bisect
+into a short list.
+"""
+
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+
+DAY = 86400
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_ALL_DAYS = ("daily", "*", "all")
+_CLOSED = ("off", "closed", "none")
+
+
+def _parse_clock(value: str) -> int:
+    parts = value.strip().split(":")
+    if not 2 <= len(parts) <= 3:
+        raise ValueError(f"Invalid time '{value}'")
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = int(parts[2]) if len(parts) == 3 else 0
+    if not (0 <= hours <= 24 and 0 <= minutes < 60 and 0 <= seconds < 60) or (hours == 24 and minutes + seconds):
+        raise ValueError(f"Invalid time '{value}'")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _parse_days(spec: str) -> list[int]:
+    if spec in _ALL_DAYS:
+        return list(range(7))
+    days = []
+    for part in spec.split(","):
+        if "-" in part:
+            first, last = (WEEKDAYS.index(p[:3]) for p in part.split("-"))
+            days.extend((first + i) % 7 for i in range((last - first) % 7 + 1))
+        else:
+            days.append(WEEKDAYS.index(part[:3]))
+    return days
+
+
+def _parse_windows(spec: str) -> list[tuple[int, int]]:
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition("-")
+        if not sep:
+            raise ValueError(f"Invalid window '{part}', expected HH:MM-HH:MM")
+        windows.append((_parse_clock(start), _parse_clock(end)))
+    return windows
+
+
+def _merge(intervals: list[tuple[int, int]]) -> list[int]:
+    """Merge half-open intervals into a flat sorted edge list [start0, end0, start1, end1, ...]."""
+    edges = []
+    for start, end in sorted(i for i in intervals if i[0] < i[1]):
+        if edges and start <= edges[-1]:
+            edges[-1] = max(edges[-1], end)
+        else:
+            edges.extend((start, end))
+    return edges
+
+
+class Schedule:
+    """A compiled schedule; see the module docstring for the rule format."""
+
+    __slots__ = ("_weekly", "_exceptions", "_last_exception")
+
+    def __init__(self, weekly: list[list[int]], exceptions: dict[date, list[int]]):
+        self._weekly = weekly
+        self._exceptions = exceptions
+        self._last_exception = max(exceptions, default=date.min)
+
+    @classmethod
+    def parse(cls, text: str) -> "Schedule":
+        """Compile schedule rules; raises ValueError on malformed input."""
+        per_day = [[] for _ in range(7)]
+        exceptions = {}
+        for raw in text.replace(";", "\n").splitlines():
+            line = raw.split("#", 1)[0].strip().lower()
+            if not line:
+                continue
+            head, _, rest = line.partition(" ")
+            rest = rest.strip()
+            try:
+                day = date.fromisoformat(head)
+            except ValueError:
+                day = None
+            if day is not None:
+                windows = exceptions.setdefault(day, [])
+                if rest not in _CLOSED:
+                    # A date rule owns its day; windows past midnight are cut at day end
+                    windows.extend((start, end if start < end else DAY) for start, end in _parse_windows(rest))
+                continue
+            try:
+                days = _parse_days(head)
+            except ValueError:
+                raise ValueError(f"Invalid days '{head}' in rule '{raw.strip()}'") from None
+            for start, end in _parse_windows(rest):
+                for weekday in days:
+                    if start < end:
+                        per_day[weekday].append((start, end))
+                    else:
+                        # Past midnight (or a full day when start == end)
+                        per_day[weekday].append((start, DAY))
+                        per_day[(weekday + 1) % 7].append((0, end))
+        return cls(
+            [_merge(windows) for windows in per_day],
+            {day: _merge(windows) for day, windows in exceptions.items()},
+        )
+
+    @classmethod
+    def daily(cls, start: time, end: time) -> "Schedule":
+        """The single daily window configured with start_time/end_time.
+
+        Unlike schedule rules its end time is inclusive, as it has always been: the
+        window closes one second after it, so 00:00:00-23:59:59 is open all day.
+        Equal start and end times also keep the whole day open.
+        """
+        first = start.hour * 3600 + start.minute * 60 + start.second
+        last = min(end.hour * 3600 + end.minute * 60 + end.second + 1, DAY)
+        if start == end:
+            windows = [(0, DAY)]
+        elif first < last:
+            windows = [(first, last)]
+        else:
+            windows = [(first, DAY), (0, last)]
+        edges = _merge(windows)
+        return cls([list(edges) for _ in range(7)], {})
+
+    def _edges(self, day: date) -> list[int]:
+        edges = self._exceptions.get(day)
+        return self._weekly[day.weekday()] if edges is None else edges
+
+    def _active(self, day: date, second: float) -> bool:
+        return bisect_right(self._edges(day), second) % 2 == 1
+
+    def is_active(self, now: datetime) -> bool:
+        """Whether the schedule is open at the given wall-clock time."""
+        return self._active(now.date(), now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6)
+
+    def next_transition(self, now: datetime) -> datetime | None:
+        """Wall-clock time (naive) of the next open/close change after now, or None if it never changes."""
+        day = now.date()
+        second = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        active = self._active(day, second)
+        # Past the last exception date the weekly pattern repeats, so a week more is enough
+        horizon = (max(self._last_exception, day) - day).days + 8
+        for offset in range(horizon):
+            current = day + timedelta(days=offset)
+            edges = self._edges(current)
+            index = bisect_right(edges, second) if offset == 0 else 0
+            # Edges at 0 or DAY only continue a window from or into a neighbouring day
+            for position in range(index, len(edges)):
+                edge = edges[position]
+                if 0 < edge < DAY:
+                    return datetime.combine(current, time()) + timedelta(seconds=edge)
+            # Crossing into the next day: a change happens at midnight if the state differs
+            following = current + timedelta(days=1)
+            if self._active(following, 0) != active:
+                return datetime.combine(following, time())
+        return None
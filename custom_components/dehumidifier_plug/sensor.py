@@ -1,35 +1,325 @@
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
-from homeassistant.const import PERCENTAGE
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorEntityDescription, SensorStateClass
+from homeassistant.const import PERCENTAGE, UnitOfEnergy, UnitOfPower, UnitOfTime
+from homeassistant.util import dt as dt_util
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
-from homeassistant.helpers.device_registry import async_get as async_get_device_registry
-from .const import DOMAIN
+from .const import DOMAIN, DATA_FLEET, TREND_PREDICTION_TIME
+from .energy import CYCLES, FULL_COUNT, KWH, ON_SECONDS
+from .status import STATUS_DEHUMIDIFYING, STATUS_FULL, FleetStatus, status_of
+from .translog import EVENT_FULL, EVENT_ON
 from .utils import slugify
 
-SENSOR_TYPES: dict[str, SensorEntityDescription] = {
-    "status": SensorEntityDescription(
+@dataclass(frozen=True, kw_only=True)
+class DehumidifierSensorEntityDescription(SensorEntityDescription):
+    """Sensor description with optional getters reading a value, attributes and last reset off the coordinator.
+
+    exists_fn decides whether the sensor is created at all for a coordinator.
+    """
+    value_fn: Callable[[Any], Any] | None = None
+    attributes_fn: Callable[[Any], dict] | None = None
+    last_reset_fn: Callable[[Any], Any] | None = None
+    exists_fn: Callable[[Any], bool] | None = None
+
+
+def _day_start(coordinator):
+    day_start = coordinator.energy.day_start
+    return dt_util.utc_from_timestamp(day_start) if day_start is not None else None
+
+
+def _humidity_attributes(coordinator) -> dict:
+    humidity = coordinator.humidity
+    return {
+        "aggregation": humidity.mode,
+        "sensors": {sensor: value for sensor, value in zip(humidity.sensors, humidity.values)},
+    }
+
+
+def _trend_attributes(coordinator) -> dict:
+    """Humidity trend and where it leads: the threshold that would switch the plug next."""
+    trend = coordinator.trend
+    now = dt_util.utcnow().timestamp()
+    slope = trend.slope(now)
+    if slope is None:
+        return {"humidity_trend": None, "predicted_humidity": None, "minutes_to_threshold": None}
+    data = coordinator.data or {}
+    config = coordinator.config
+    threshold = config.humidity_off_threshold if data.get("is_on") else config.humidity_on_threshold
+    remaining = trend.time_to(threshold, now)
+    return {
+        "humidity_trend": round(slope * 3600, 2),
+        "predicted_humidity": round(trend.predict(now + TREND_PREDICTION_TIME, now), 1),
+        "minutes_to_threshold": round(remaining / 60, 1) if remaining is not None else None,
+    }
+
+
+def _next_planned_run(coordinator):
+    plan = coordinator.price_plan
+    window = plan.next_window(dt_util.utcnow().timestamp()) if plan else None
+    return dt_util.utc_from_timestamp(window[0]) if window else None
+
+
+def _price_plan_attributes(coordinator) -> dict:
+    plan = coordinator.price_plan
+    if plan is None:
+        return {"windows": [], "plan_end": None}
+    now = dt_util.utcnow().timestamp()
+    return {
+        "windows": [
+            {"start": dt_util.utc_from_timestamp(start).isoformat(), "end": dt_util.utc_from_timestamp(end).isoformat()}
+            for start, end in plan.windows
+            if end > now
+        ],
+        "plan_end": dt_util.utc_from_timestamp(plan.end).isoformat(),
+    }
+
+
+def _store_writes(coordinator) -> int:
+    """Writes of the file holding this dehumidifier's state: its own, or the shared fleet file."""
+    if coordinator.config.fleet_mode and (fleet := coordinator.hass.data.get(DOMAIN, {}).get(DATA_FLEET)):
+        return fleet.store_writes
+    return coordinator.metrics.store_writes
+
+
+def _logged(coordinator, event: int) -> int | None:
+    """Logged transitions of the last TRANSLOG_SUMMARY_DAYS days, not counting ones still buffered."""
+    return coordinator.log_summary.get(event) if coordinator.log_summary is not None else None
+
+
+def _histogram_attributes(histogram) -> dict:
+    return {
+        "count": histogram.count,
+        "mean": round(histogram.mean, 2) if histogram.mean is not None else None,
+        "p50": histogram.quantile(0.5),
+        "p95": histogram.quantile(0.95),
+        "max": round(histogram.max, 2) if histogram.max is not None else None,
+    }
+
+
+SENSOR_TYPES: dict[str, DehumidifierSensorEntityDescription] = {
+    "status": DehumidifierSensorEntityDescription(
         key="status",
         name="Status",
         icon="mdi:air-humidifier",
+        attributes_fn=_trend_attributes,
+    ),
+    "energy_today": DehumidifierSensorEntityDescription(
+        key="energy_today",
+        name="Energy Today",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: round(coordinator.energy.today[KWH], 3),
+        last_reset_fn=_day_start,
+    ),
+    "energy_total": DehumidifierSensorEntityDescription(
+        key="energy_total",
+        name="Energy Total",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: round(coordinator.energy.lifetime[KWH], 3),
+    ),
+    "runtime_today": DehumidifierSensorEntityDescription(
+        key="runtime_today",
+        name="Runtime Today",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: round(coordinator.energy.today[ON_SECONDS] / 3600, 3),
+        last_reset_fn=_day_start,
+    ),
+    "runtime_total": DehumidifierSensorEntityDescription(
+        key="runtime_total",
+        name="Runtime Total",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=lambda coordinator: round(coordinator.energy.lifetime[ON_SECONDS] / 3600, 3),
+    ),
+    "cycles": DehumidifierSensorEntityDescription(
+        key="cycles",
+        name="Cycles",
+        icon="mdi:sync",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.energy.lifetime[CYCLES],
+        attributes_fn=lambda coordinator: {
+            "today": coordinator.energy.today[CYCLES],
+            "last_30_days": _logged(coordinator, EVENT_ON),
+        },
+    ),
+    "tank_full_count": DehumidifierSensorEntityDescription(
+        key="tank_full_count",
+        name="Tank Full Count",
+        icon="mdi:cup-water",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.energy.lifetime[FULL_COUNT],
+        attributes_fn=lambda coordinator: {
+            "today": coordinator.energy.today[FULL_COUNT],
+            "last_30_days": _logged(coordinator, EVENT_FULL),
+        },
+    ),
+    "store_writes_skipped": DehumidifierSensorEntityDescription(
+        key="store_writes_skipped",
+        name="Store Writes Skipped",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:content-save-off-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.metrics.store_writes_skipped,
+    ),
+    "store_writes": DehumidifierSensorEntityDescription(
+        key="store_writes",
+        name="Store Writes",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:content-save-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=_store_writes,
+    ),
+    "update_duration": DehumidifierSensorEntityDescription(
+        key="update_duration",
+        name="Update Duration",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:timer-cog-outline",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.metrics.update_duration.last,
+        attributes_fn=lambda coordinator: _histogram_attributes(coordinator.metrics.update_duration),
+    ),
+    "updates_failed": DehumidifierSensorEntityDescription(
+        key="updates_failed",
+        name="Updates Failed",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.metrics.updates_failed,
+        attributes_fn=lambda coordinator: {"updates": coordinator.metrics.updates},
+    ),
+    "refreshes_coalesced": DehumidifierSensorEntityDescription(
+        key="refreshes_coalesced",
+        name="Refreshes Coalesced",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:call-merge",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.metrics.refreshes_coalesced,
+    ),
+    "state_read_misses": DehumidifierSensorEntityDescription(
+        key="state_read_misses",
+        name="State Read Misses",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:database-off-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.metrics.state_read_misses,
+    ),
+    "service_calls": DehumidifierSensorEntityDescription(
+        key="service_calls",
+        name="Service Calls",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:power-plug-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.actuator.commands_sent,
+        attributes_fn=lambda coordinator: {
+            "failed": coordinator.actuator.commands_failed,
+            "retries": coordinator.actuator.retries,
+            "deduplicated": coordinator.actuator.commands_deduplicated,
+        },
+    ),
+    "switch_latency": DehumidifierSensorEntityDescription(
+        key="switch_latency",
+        name="Switch Latency",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: round(coordinator.actuator.last_latency * 1000)
+        if coordinator.actuator.last_latency is not None else None,
+        attributes_fn=lambda coordinator: _histogram_attributes(coordinator.actuator.latency),
+    ),
+    "refresh_interval": DehumidifierSensorEntityDescription(
+        key="refresh_interval",
+        name="Refresh Interval",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:update",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.refresh_interval,
+    ),
+    "filtered_power": DehumidifierSensorEntityDescription(
+        key="filtered_power",
+        name="Filtered Power",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:flash-outline",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.power_stats.value,
+    ),
+    "aggregated_humidity": DehumidifierSensorEntityDescription(
+        key="aggregated_humidity",
+        name="Aggregated Humidity",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.humidity.value(dt_util.utcnow().timestamp()),
+        attributes_fn=_humidity_attributes,
+    ),
+    "next_planned_run": DehumidifierSensorEntityDescription(
+        key="next_planned_run",
+        name="Next Planned Run",
+        icon="mdi:cash-clock",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=_next_planned_run,
+        attributes_fn=_price_plan_attributes,
+        exists_fn=lambda coordinator: bool(coordinator.config.price_sensor),
     ),
 }
 
 async def async_setup_entry(hass, entry, async_add_entities):
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-
-    entity_registry = async_get_entity_registry(hass)
-    device_registry = async_get_device_registry(hass)
-    entity_entry = entity_registry.async_get(coordinator.config.switch_entity)
-    device_entry = device_registry.async_get(entity_entry.device_id) if entity_entry else None
-    device_identifiers = device_entry.identifiers if device_entry else None
+    device_identifiers = coordinator.entities.device_identifiers
 
     entities = [
         DehumidifierSensor(coordinator, sensor_id, description, device_identifiers)
         for sensor_id, description in SENSOR_TYPES.items()
+        if description.exists_fn is None or description.exists_fn(coordinator)
     ]
     async_add_entities(entities)
+    if coordinator.config.fleet_status_sensor:
+        status = FleetStatus.async_get(hass)
+        # One aggregate sensor for all dehumidifiers, hosted by one of the entries asking for it
+        entry.async_on_unload(
+            status.async_add_sensor_host(
+                entry.entry_id, lambda: async_add_entities([FleetStatusSensor(status, entry.entry_id)])
+            )
+        )
 
 class DehumidifierSensor(SensorEntity):
+    # State is pushed by the coordinator listener; polling would force extra refreshes
+    _attr_should_poll = False
+
     def __init__(self, coordinator, sensor_id, description, device_identifiers):
         self.coordinator = coordinator
         self.sensor_id = sensor_id
@@ -37,29 +327,32 @@ class DehumidifierSensor(SensorEntity):
         object_id = slugify(f"{coordinator.config.name}_{sensor_id}")
         self._attr_name = f"{coordinator.config.name} {description.name}"
         self._attr_unique_id = f"dehumidifier_{object_id}"
-        if sensor_id != "status":
-            self._attr_entity_category = EntityCategory.DIAGNOSTIC
         self._device_identifiers = device_identifiers
 
     @property
     def native_value(self):
-        data = self.coordinator.data
-        if not data:
-            return None
-
-        # Priority: Full > Dehumidifying > Outside hours > Below target > Idle
-        if data.get("is_full"):
-            return "Full"
-        if data.get("is_on") or data.get("manual_override"):
-            return "Dehumidifying"
-        if not data.get("inside_schedule"):
-            return "Outside dehumidifying hours"
-        if data.get("humidity_low"):
-            return "Below target humidity"
-        return "Idle"
+        if self.entity_description.value_fn:
+            return self.entity_description.value_fn(self.coordinator)
+
+        return status_of(self.coordinator.data)
+
+    @property
+    def last_reset(self):
+        if self.entity_description.last_reset_fn:
+            return self.entity_description.last_reset_fn(self.coordinator)
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        if self.entity_description.attributes_fn:
+            return self.entity_description.attributes_fn(self.coordinator)
+        return None
 
     @property
     def available(self):
+        # Diagnostic values stay readable while updates fail; they often explain why
+        if self.entity_description.value_fn:
+            return True
         return self.coordinator.last_update_success
 
     @property
@@ -75,3 +368,50 @@ class DehumidifierSensor(SensorEntity):
         self.async_on_remove(
             self.coordinator.async_add_listener(self.async_write_ha_state)
         )
+
+class FleetStatusSensor(SensorEntity):
+    """Number of dehumidifiers running, with the status of each of them as an attribute.
+
+    It is written once per batch of changes from the fleet status, however many
+    dehumidifiers changed.
+    """
+
+    _attr_should_poll = False
+    _attr_name = "Dehumidifier Fleet Status"
+    _attr_unique_id = f"{DOMAIN}_fleet_status"
+    _attr_icon = "mdi:air-humidifier"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    # The per-unit details change often and are already in each unit's own history
+    _unrecorded_attributes = frozenset({"dehumidifiers"})
+
+    def __init__(self, status: FleetStatus, host: str):
+        self._status = status
+        self._host = host
+        self._fleet = {}
+
+    @property
+    def native_value(self):
+        return sum(1 for fields in self._fleet.values() if fields.get("status") == STATUS_DEHUMIDIFYING)
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "full": sum(1 for fields in self._fleet.values() if fields.get("status") == STATUS_FULL),
+            "dehumidifiers": self._fleet,
+        }
+
+    @callback
+    def _async_changed(self, changes: dict):
+        for key, fields in changes.items():
+            if fields is None:
+                self._fleet.pop(key, None)
+            else:
+                self._fleet[key] = {**self._fleet.get(key, {}), **fields}
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._status.async_subscribe(self._async_changed))
+        self._fleet = self._status.async_snapshot()
+
+    async def async_will_remove_from_hass(self):
+        self._status.async_sensor_removed(self._host)
@@ -0,0 +1,42 @@
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, SERVICE_GET_TRACE
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_LIMIT = "limit"
+
+GET_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_LIMIT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant):
+    """Register the integration's services."""
+
+    async def async_get_trace(call: ServiceCall) -> ServiceResponse:
+        """Return the recent control decisions of one or all dehumidifiers."""
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        entries = hass.config_entries.async_entries(DOMAIN)
+        if entry_id is not None:
+            entries = [entry for entry in entries if entry.entry_id == entry_id]
+            if not entries:
+                raise ServiceValidationError(f"No dehumidifier with config entry id {entry_id}")
+
+        traces = {}
+        for entry in entries:
+            entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+            if entry_data:
+                traces[entry.title] = entry_data["coordinator"].trace.as_list(call.data.get(ATTR_LIMIT))
+        return {"dehumidifiers": traces}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_TRACE, async_get_trace, schema=GET_TRACE_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
@@ -0,0 +1,210 @@
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_STATUS, STATUS_PUSH_DELAY
+
+STATUS_FULL = "Full"
+STATUS_DEHUMIDIFYING = "Dehumidifying"
+STATUS_WAITING_FOR_CIRCUIT = "Waiting for circuit"
+STATUS_OUTSIDE_HOURS = "Outside dehumidifying hours"
+STATUS_BELOW_TARGET = "Below target humidity"
+STATUS_IDLE = "Idle"
+
+
+def status_of(data: dict | None) -> str | None:
+    """The status shown for a coordinator data dict."""
+    if not data:
+        return None
+    # Priority: Full > Dehumidifying > Outside hours > Below target > Idle
+    if data.get("is_full"):
+        return STATUS_FULL
+    if data.get("is_on") or data.get("manual_override"):
+        return STATUS_DEHUMIDIFYING
+    if data.get("waiting_for_circuit"):
+        return STATUS_WAITING_FOR_CIRCUIT
+    if not data.get("inside_schedule"):
+        return STATUS_OUTSIDE_HOURS
+    if data.get("humidity_low"):
+        return STATUS_BELOW_TARGET
+    return STATUS_IDLE
+
+
+def _rounded(value: float | None, digits: int) -> float | None:
+    return round(value, digits) if value is not None else None
+
+
+class FleetStatus:
+    """Compact status of every dehumidifier, pushed to subscribers as field-level deltas.
+
+    Members are marked dirty when their coordinator notifies its listeners, and
+    dirty members are compared with what subscribers last received at most once
+    per STATUS_PUSH_DELAY. Subscribers get one dict per batch, keyed by config
+    entry id, holding only the fields that changed; a member that went away is
+    sent as None. Nothing is tracked while nobody is subscribed.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._members = {}
+        self._sent = {}
+        self._dirty = set()
+        self._subscribers = []
+        self._unsub_push = None
+        # Entries asking for the fleet status sensor, with the callback that adds it to them
+        self._sensor_hosts = {}
+        self.sensor_owner = None
+        self.pushes = 0
+
+    @staticmethod
+    @callback
+    def async_get(hass: HomeAssistant) -> "FleetStatus":
+        """Return the status hub for this Home Assistant instance, creating it if needed."""
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        if DATA_STATUS not in domain_data:
+            domain_data[DATA_STATUS] = FleetStatus(hass)
+        return domain_data[DATA_STATUS]
+
+    @callback
+    def async_add_member(self, key: str, coordinator) -> Callable[[], None]:
+        """Follow a coordinator's updates; returns the callback that removes it again."""
+        self._members[key] = coordinator
+        unsub_listener = coordinator.async_add_listener(lambda: self._async_mark_dirty(key))
+        self._async_mark_dirty(key)
+
+        @callback
+        def _async_remove():
+            unsub_listener()
+            if self._members.get(key) is coordinator:
+                del self._members[key]
+                self._async_mark_dirty(key)
+
+        return _async_remove
+
+    @callback
+    def async_add_sensor_host(self, key: str, add_sensor: Callable[[], None]) -> Callable[[], None]:
+        """Offer an entry to host the fleet status sensor; returns the callback that withdraws it.
+
+        The sensor lives on one host at a time: the first one offered creates it.
+        """
+        self._sensor_hosts[key] = add_sensor
+        if self.sensor_owner is None:
+            self._async_place_sensor()
+
+        @callback
+        def _async_remove():
+            self._sensor_hosts.pop(key, None)
+
+        return _async_remove
+
+    @callback
+    def async_sensor_removed(self, key: str):
+        """Hand the fleet status sensor on to another host when its owner's entry unloads."""
+        if self.sensor_owner != key:
+            return
+        self.sensor_owner = None
+        self._sensor_hosts.pop(key, None)
+        self._async_place_sensor()
+
+    @callback
+    def _async_place_sensor(self):
+        for key, add_sensor in self._sensor_hosts.items():
+            self.sensor_owner = key
+            add_sensor()
+            return
+
+    def snapshot(self, key: str) -> dict | None:
+        """Current status fields of one member, None if it is not set up."""
+        coordinator = self._members.get(key)
+        if coordinator is None:
+            return None
+        data = coordinator.data or {}
+        auto_switch = coordinator.entities.auto_switch
+        state_auto = self.hass.states.get(auto_switch) if auto_switch else None
+        return {
+            "name": coordinator.config.name,
+            "available": coordinator.last_update_success,
+            "status": status_of(data),
+            "control": state_auto is not None and state_auto.state == "on",
+            **data,
+            "humidity": _rounded(coordinator.humidity.value(dt_util.utcnow().timestamp()), 1),
+            "power": _rounded(coordinator.power, 1),
+        }
+
+    @callback
+    def async_snapshot(self) -> dict:
+        """Status of every member, up to date with what subscribers have been sent."""
+        if self._subscribers:
+            self._async_push()
+            return {key: dict(fields) for key, fields in self._sent.items()}
+        return {key: self.snapshot(key) for key in self._members}
+
+    @callback
+    def async_subscribe(self, subscriber: Callable[[dict], None]) -> Callable[[], None]:
+        """Call subscriber with each batch of changes; returns the unsubscribe callback."""
+        if self._subscribers:
+            # Bring the others up to date so the newcomer starts from the same status
+            self._async_push()
+        else:
+            self._sent = {key: self.snapshot(key) for key in self._members}
+            self._dirty.clear()
+        self._subscribers.append(subscriber)
+
+        @callback
+        def _async_unsubscribe():
+            self._subscribers.remove(subscriber)
+            if self._subscribers:
+                return
+            if self._unsub_push:
+                self._unsub_push()
+                self._unsub_push = None
+            self._sent = {}
+            self._dirty.clear()
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_mark_dirty(self, key: str):
+        if not self._subscribers:
+            return
+        self._dirty.add(key)
+        if self._unsub_push is None:
+            self._unsub_push = async_call_later(self.hass, STATUS_PUSH_DELAY, self._async_push_due)
+
+    @callback
+    def _async_push_due(self, _now):
+        self._unsub_push = None
+        self._async_push()
+
+    @callback
+    def _async_push(self):
+        """Send the changed fields of the dirty members to every subscriber."""
+        if self._unsub_push:
+            self._unsub_push()
+            self._unsub_push = None
+        changes = {}
+        for key in self._dirty:
+            current = self.snapshot(key)
+            previous = self._sent.get(key)
+            if current is None:
+                if key in self._sent:
+                    del self._sent[key]
+                    changes[key] = None
+                continue
+            self._sent[key] = current
+            if previous is None:
+                changes[key] = current
+                continue
+            delta = {field: value for field, value in current.items() if previous.get(field) != value}
+            # Fields missing now (no evaluation yet after a failure) are sent as None
+            delta.update(dict.fromkeys(previous.keys() - current.keys()))
+            if delta:
+                changes[key] = delta
+        self._dirty.clear()
+        if not changes:
+            return
+        self.pushes += 1
+        for subscriber in list(self._subscribers):
+            subscriber(changes)
@@ -0,0 +1,110 @@
+"""Fixed-capacity trail of recent control decisions for one dehumidifier.
+
+Records are stored as plain tuples with the boolean flags packed into one int,
+and only turned into readable dicts when someone asks for them (diagnostics
+download or the get_trace service).
+"""
+
+from collections import deque
+from datetime import datetime, timezone
+
+# Bits of the packed flags field
+FLAG_AUTO_ENABLED = 1
+FLAG_INSIDE_SCHEDULE = 2
+FLAG_IS_ON = 4
+FLAG_IS_FULL = 8
+FLAG_HUMIDITY_LOW = 16
+FLAG_HUMIDITY_HIGH = 32
+FLAG_MANUAL_OVERRIDE = 64
+
+FLAG_NAMES = (
+    (FLAG_AUTO_ENABLED, "auto_enabled"),
+    (FLAG_INSIDE_SCHEDULE, "inside_schedule"),
+    (FLAG_IS_ON, "is_on"),
+    (FLAG_IS_FULL, "is_full"),
+    (FLAG_HUMIDITY_LOW, "humidity_low"),
+    (FLAG_HUMIDITY_HIGH, "humidity_high"),
+    (FLAG_MANUAL_OVERRIDE, "manual_override"),
+)
+
+# Positions in a record tuple
+_FIRST = 0
+_LAST = 1
+_REPEATS = 2
+_SWITCH = 3
+_POWER = 4
+_HUMIDITY = 5
+_FLAGS = 6
+_ACTIONS = 7
+_REASON = 8
+
+
+class DecisionTrace:
+    """Ring buffer of decision records, O(1) per evaluation.
+
+    Consecutive evaluations with the same flags, reason and no action are folded
+    into one record (its time span and repeat count grow, the readings are those
+    of the latest), so the buffer covers hours of steady state rather than minutes.
+    """
+
+    __slots__ = ("_records",)
+
+    def __init__(self, capacity: int):
+        self._records = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(self, now: float, inputs, decision):
+        """Append the outcome of one evaluation of engine.evaluate()."""
+        flags = (
+            (FLAG_AUTO_ENABLED if inputs.auto_enabled else 0)
+            | (FLAG_INSIDE_SCHEDULE if decision.inside_schedule else 0)
+            | (FLAG_IS_ON if decision.is_on else 0)
+            | (FLAG_IS_FULL if decision.is_full else 0)
+            | (FLAG_HUMIDITY_LOW if decision.humidity_low else 0)
+            | (FLAG_HUMIDITY_HIGH if decision.humidity_high else 0)
+            | (FLAG_MANUAL_OVERRIDE if decision.state.manual_override else 0)
+        )
+        records = self._records
+        if records and not decision.actions:
+            last = records[-1]
+            if not last[_ACTIONS] and last[_FLAGS] == flags and last[_REASON] == decision.reason:
+                records[-1] = (
+                    last[_FIRST], now, last[_REPEATS] + 1, inputs.switch_state, inputs.power, inputs.humidity, flags, (), decision.reason
+                )
+                return
+        records.append(
+            (now, now, 1, inputs.switch_state, inputs.power, inputs.humidity, flags, tuple(decision.actions), decision.reason)
+        )
+
+    def clear(self):
+        self._records.clear()
+
+    def as_list(self, limit: int | None = None) -> list[dict]:
+        """Readable records, oldest first; limit keeps only the most recent ones."""
+        records = list(self._records)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return [_format(record) for record in records]
+
+
+def _format(record: tuple) -> dict:
+    flags = record[_FLAGS]
+    formatted = {
+        "time": _isoformat(record[_FIRST]),
+        "switch": record[_SWITCH],
+        "power": record[_POWER],
+        "humidity": record[_HUMIDITY],
+        **{name: bool(flags & bit) for bit, name in FLAG_NAMES},
+        "actions": list(record[_ACTIONS]),
+        "reason": record[_REASON],
+    }
+    if record[_REPEATS] > 1:
+        formatted["until"] = _isoformat(record[_LAST])
+        formatted["repeats"] = record[_REPEATS]
+    return formatted
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
@@ -0,0 +1,153 @@
+"""Append-only binary log of on/off/full/override transitions, one per dehumidifier.
+
+File access is blocking and meant to run in an executor. Every record is 8 bytes:
+
+    uint32 time (UTC epoch seconds), uint8 event, uint8 reason code,
+    int16 humidity in tenths of a point (HUMIDITY_UNKNOWN when not known)
+
+after an 8-byte header. When the current file would grow past max_bytes it is
+renamed to <name>.1.bin, older files move up by one, and the oldest beyond
+`files` is deleted. Readers scan backwards from the newest record, so recent
+history reads back without touching older files.
+"""
+
+import os
+import struct
+
+EVENT_ON = 1
+EVENT_OFF = 2
+EVENT_FULL = 3
+EVENT_FULL_CLEARED = 4
+EVENT_OVERRIDE = 5
+EVENT_OVERRIDE_CLEARED = 6
+
+EVENT_NAMES = {
+    EVENT_ON: "on",
+    EVENT_OFF: "off",
+    EVENT_FULL: "full",
+    EVENT_FULL_CLEARED: "full_cleared",
+    EVENT_OVERRIDE: "override",
+    EVENT_OVERRIDE_CLEARED: "override_cleared",
+}
+
+HUMIDITY_UNKNOWN = -32768
+
+RECORD = struct.Struct("<IBBh")
+HEADER = b"DHTL\x01\x08\x00\x00"
+_CHUNK_RECORDS = 4096
+
+
+def pack(timestamp: float, event: int, reason: int, humidity: float | None) -> bytes:
+    """One record, ready to be appended."""
+    tenths = HUMIDITY_UNKNOWN if humidity is None else max(-32767, min(32767, round(humidity * 10)))
+    return RECORD.pack(int(timestamp), event, reason, tenths)
+
+
+def humidity_of(record: tuple) -> float | None:
+    return None if record[3] == HUMIDITY_UNKNOWN else record[3] / 10
+
+
+class TransitionLog:
+    """The rotating set of log files of one dehumidifier."""
+
+    __slots__ = ("directory", "name", "max_bytes", "files")
+
+    def __init__(self, directory: str, name: str, max_bytes: int, files: int):
+        self.directory = directory
+        self.name = name
+        # Whole records only, and at least room for one after the header
+        self.max_bytes = max(max_bytes - (max_bytes - len(HEADER)) % RECORD.size, len(HEADER) + RECORD.size)
+        self.files = max(files, 1)
+
+    def path(self, generation: int = 0) -> str:
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(self.directory, f"{self.name}{suffix}.bin")
+
+    def write(self, data: bytes):
+        """Append packed records, rotating first whenever the current file is full."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path()
+        size = self._size(path)
+        if size and size != os.path.getsize(path):
+            # A write torn by a crash left part of a record at the end
+            os.truncate(path, size)
+        while data:
+            if size >= self.max_bytes:
+                self._rotate()
+                size = 0
+            if size == 0:
+                with open(path, "wb") as file:
+                    file.write(HEADER)
+                size = len(HEADER)
+            room = self.max_bytes - size
+            chunk, data = data[:room], data[room:]
+            with open(path, "ab") as file:
+                file.write(chunk)
+            size += len(chunk)
+
+    def read(self, limit: int | None = None, since: float | None = None) -> list[tuple]:
+        """Records (time, event, reason, humidity tenths), newest first."""
+        records = []
+        for record in self._reverse():
+            if (since is not None and record[0] < since) or (limit is not None and len(records) >= limit):
+                break
+            records.append(record)
+        return records
+
+    def count(self, since: float) -> dict[int, int]:
+        """Number of records of each event since the given time."""
+        counts = dict.fromkeys(EVENT_NAMES, 0)
+        for record in self._reverse():
+            if record[0] < since:
+                break
+            counts[record[1]] = counts.get(record[1], 0) + 1
+        return counts
+
+    def size(self) -> int:
+        """Bytes used on disk by all files."""
+        return sum(self._size(self.path(generation)) for generation in range(self.files))
+
+    def remove(self):
+        for generation in range(self.files):
+            try:
+                os.remove(self.path(generation))
+            except FileNotFoundError:
+                pass
+
+    def _size(self, path: str) -> int:
+        """Size of a file up to its last whole record."""
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+        if size < len(HEADER):
+            return 0
+        return size - (size - len(HEADER)) % RECORD.size
+
+    def _rotate(self):
+        oldest = self.path(self.files - 1)
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for generation in range(self.files - 2, -1, -1):
+            if os.path.exists(self.path(generation)):
+                os.replace(self.path(generation), self.path(generation + 1))
+
+    def _reverse(self):
+        for generation in range(self.files):
+            path = self.path(generation)
+            try:
+                file = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with file:
+                if file.read(len(HEADER)) != HEADER:
+                    continue
+                file.seek(0, os.SEEK_END)
+                end = file.tell()
+                end -= (end - len(HEADER)) % RECORD.size
+                while end > len(HEADER):
+                    start = max(len(HEADER), end - _CHUNK_RECORDS * RECORD.size)
+                    file.seek(start)
+                    chunk = file.read(end - start)
+                    yield from reversed(list(RECORD.iter_unpack(chunk)))
+                    end = start
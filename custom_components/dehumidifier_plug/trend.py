@@ -0,0 +1,133 @@
+"""Least-squares humidity trend over a bounded window, updated one reading at a time.
+
+Times are UTC epoch seconds, slopes percentage points per second.
+"""
+
+from collections import deque
+
+
+class HumidityTrend:
+    """Straight line fitted through the humidity readings of the last `window` seconds.
+
+    Running sums make adding and expiring a reading O(1). Times are kept relative
+    to an origin that is moved up to the oldest reading every `max_samples`
+    expiries, when the sums are also recomputed so rounding errors cannot build up.
+    The fit is only trusted once it spans min_span seconds with min_samples readings.
+    """
+
+    __slots__ = (
+        "window",
+        "max_samples",
+        "min_samples",
+        "min_span",
+        "_samples",
+        "_origin",
+        "_expired",
+        "_n",
+        "_st",
+        "_sh",
+        "_stt",
+        "_sth",
+    )
+
+    def __init__(self, window: float, max_samples: int, min_samples: int = 3, min_span: float = 0):
+        self.window = window
+        self.max_samples = max_samples
+        self.min_samples = max(min_samples, 2)
+        self.min_span = min_span
+        self._samples = deque()
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._n
+
+    def clear(self):
+        self._samples.clear()
+        self._origin = None
+        self._expired = 0
+        self._n = 0
+        self._st = self._sh = self._stt = self._sth = 0.0
+
+    def add(self, timestamp: float, value: float):
+        """Record a reading; the oldest ones drop out by age and count.
+
+        A reading older than the newest one is ignored, so samples stay in time order.
+        """
+        if self._origin is None:
+            self._origin = timestamp
+        t = timestamp - self._origin
+        if self._samples and t < self._samples[-1][0]:
+            return
+        self._samples.append((t, value))
+        self._n += 1
+        self._st += t
+        self._sh += value
+        self._stt += t * t
+        self._sth += t * value
+        self._expire(timestamp)
+        while self._n > self.max_samples:
+            self._pop()
+
+    def slope(self, now: float) -> float | None:
+        """Rate of change in percentage points per second, None while the fit is not trusted."""
+        self._expire(now)
+        if self._n < self.min_samples or self._samples[-1][0] - self._samples[0][0] < self.min_span:
+            return None
+        denominator = self._n * self._stt - self._st * self._st
+        if denominator <= 0:
+            return None
+        return (self._n * self._sth - self._st * self._sh) / denominator
+
+    def predict(self, timestamp: float, now: float) -> float | None:
+        """Humidity the line gives for timestamp, None while the fit is not trusted."""
+        slope = self.slope(now)
+        if slope is None:
+            return None
+        intercept = (self._sh - slope * self._st) / self._n
+        return intercept + slope * (timestamp - self._origin)
+
+    def time_to(self, level: float, now: float) -> float | None:
+        """Seconds from now until the line reaches level, None if it is not heading there."""
+        slope = self.slope(now)
+        if not slope:
+            return None
+        remaining = (level - self.predict(now, now)) / slope
+        return remaining if remaining >= 0 else None
+
+    def as_dict(self, now: float) -> dict:
+        slope = self.slope(now)
+        return {
+            "samples": self._n,
+            "span": self._samples[-1][0] - self._samples[0][0] if self._samples else 0.0,
+            "slope_per_hour": slope * 3600 if slope is not None else None,
+        }
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        # The origin moves when the sums are rebased, so compare absolute times
+        while self._samples and self._samples[0][0] + self._origin < cutoff:
+            self._pop()
+
+    def _pop(self):
+        t, value = self._samples.popleft()
+        self._n -= 1
+        if not self._n:
+            self.clear()
+            return
+        self._st -= t
+        self._sh -= value
+        self._stt -= t * t
+        self._sth -= t * value
+        self._expired += 1
+        if self._expired >= self.max_samples:
+            self._rebase()
+
+    def _rebase(self):
+        shift = self._samples[0][0]
+        self._origin += shift
+        self._samples = deque((t - shift, value) for t, value in self._samples)
+        self._expired = 0
+        self._st = sum(t for t, _ in self._samples)
+        self._sh = sum(value for _, value in self._samples)
+        self._stt = sum(t * t for t, _ in self._samples)
+        self._sth = sum(t * value for t, value in self._samples)
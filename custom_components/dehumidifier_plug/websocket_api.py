@@ -0,0 +1,36 @@
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .status import FleetStatus
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant):
+    """Register the integration's websocket commands."""
+    websocket_api.async_register_command(hass, websocket_status)
+    websocket_api.async_register_command(hass, websocket_subscribe_status)
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/status"})
+@callback
+def websocket_status(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict):
+    """Return the status of every dehumidifier, keyed by config entry id."""
+    connection.send_result(msg["id"], {"dehumidifiers": FleetStatus.async_get(hass).async_snapshot()})
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/subscribe_status"})
+@callback
+def websocket_subscribe_status(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict):
+    """Send the status of every dehumidifier, then only the fields that change."""
+    status = FleetStatus.async_get(hass)
+
+    @callback
+    def _async_forward(changes: dict):
+        connection.send_message(websocket_api.event_message(msg["id"], {"dehumidifiers": changes}))
+
+    connection.subscriptions[msg["id"]] = status.async_subscribe(_async_forward)
+    connection.send_result(msg["id"])
+    _async_forward(status.async_snapshot())
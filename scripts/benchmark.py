@@ -0,0 +1,374 @@
+"""Benchmark the integration's control loop against an in-process Home Assistant core.
+
+Boots a local Home Assistant core (state machine, service registry, Store, entity
+registry) in a temporary config directory, with no network and no HTTP server,
+and loads the integration from this checkout for 1, 50 and 500 config entries
+(or the sizes given with --entries). Plugs and sensors are plain states; the
+switch.turn_on/turn_off services are replaced by stand-ins that flip the plug
+state, so every command lands immediately.
+
+For each size it reports:
+
+- startup: wall time of setting up every entry (first refresh and platforms included)
+- update: wall time of one _async_update_data() call and of one full refresh
+  (which also writes the entity states)
+- latency: time from a humidity change to the plug switching on and off, for all
+  devices changing at once (event-driven mode only)
+- store writes: store files written per simulated hour (one shared file in fleet
+  mode), from a simulation that
+  advances a virtual clock in --step increments and flushes pending delayed writes
+  after each step, as if the write delay had passed
+- memory: Python heap allocated per device during setup (tracemalloc, measured
+  in a separate pass so it does not slow down the timings)
+
+It needs Home Assistant installed (the version from a dev environment is fine).
+
+Example:
+    python scripts/benchmark.py --entries 1,50,500 --event-driven --json results.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from homeassistant import bootstrap, config_entries, core, loader
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE, EVENT_STATE_CHANGED
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+COMPONENT_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "dehumidifier_plug"
+
+RUNNING_POWER = 200.0  # Watts drawn by a simulated unit while running
+
+
+def _load_module(name: str):
+    """Load a dependency-free module of the integration without importing Home Assistant."""
+    spec = importlib.util.spec_from_file_location(f"dehumidifier_plug_{name}", COMPONENT_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+const = _load_module("const")
+
+
+# Local Home Assistant core
+
+class Bench:
+    """One Home Assistant instance with N simulated dehumidifiers."""
+
+    def __init__(self, config_dir: Path, size: int, options: dict):
+        self.config_dir = config_dir
+        self.size = size
+        self.options = options
+        self.hass = None
+        self.entries = []
+        self.setup_times = []
+
+    async def async_start(self):
+        hass = self.hass = core.HomeAssistant(str(self.config_dir))
+        hass.config.set_time_zone("UTC")
+        hass.config.skip_pip = True
+        loader.async_setup(hass)
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await bootstrap.async_load_base_functionality(hass)
+        hass.set_state(core.CoreState.running)
+        for domain in ("sensor", "switch"):
+            await async_setup_component(hass, domain, {})
+        # Stand-in for the plug integration: a command flips the plug state right away
+        for service in ("turn_on", "turn_off"):
+            hass.services.async_register("switch", service, self._async_switch_service)
+
+    async def _async_switch_service(self, call: core.ServiceCall):
+        entity_ids = call.data["entity_id"]
+        for entity_id in [entity_ids] if isinstance(entity_ids, str) else entity_ids:
+            self.hass.states.async_set(entity_id, "on" if call.service == "turn_on" else "off", context=call.context)
+
+    async def async_add_entries(self):
+        """Set up every entry one after the other, timing each."""
+        for index in range(self.size):
+            name = f"bench_{index:03d}"
+            self.hass.states.async_set(f"switch.{name}_plug", "off")
+            self.hass.states.async_set(f"sensor.{name}_power", "0")
+            self.hass.states.async_set(f"sensor.{name}_humidity", "55")
+            entry = config_entries.ConfigEntry(
+                version=1,
+                minor_version=1,
+                domain=const.DOMAIN,
+                title=name,
+                data={
+                    const.CONF_SWITCH: f"switch.{name}_plug",
+                    const.CONF_POWER: f"sensor.{name}_power",
+                    const.CONF_HUMIDITY: f"sensor.{name}_humidity",
+                    const.CONF_FULL_THRESHOLD: const.DEFAULT_FULL_THRESHOLD,
+                    const.CONF_HUMIDITY_ON: const.DEFAULT_HUMIDITY_ON,
+                    const.CONF_HUMIDITY_OFF: const.DEFAULT_HUMIDITY_OFF,
+                    const.CONF_START_TIME: "00:00:00",
+                    const.CONF_END_TIME: "23:59:59",
+                },
+                source=config_entries.SOURCE_USER,
+                options=dict(self.options),
+            )
+            began = time.perf_counter()
+            await self.hass.config_entries.async_add(entry)
+            await self.hass.async_block_till_done()
+            self.setup_times.append(time.perf_counter() - began)
+            self.entries.append(entry)
+
+    @property
+    def coordinators(self) -> list:
+        return [self.hass.data[const.DOMAIN][entry.entry_id]["coordinator"] for entry in self.entries]
+
+    async def async_stop(self):
+        await self.hass.async_stop()
+        shutil.rmtree(self.config_dir / ".storage", ignore_errors=True)
+
+
+# Measurements
+
+def _summary(values: list[float], scale: float = 1.0) -> dict:
+    """Mean, p50, p95 and max of values, multiplied by scale."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(ordered) * scale,
+        "p50": ordered[len(ordered) // 2] * scale,
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * scale,
+        "max": ordered[-1] * scale,
+    }
+
+
+async def measure_updates(bench: Bench, cycles: int) -> dict:
+    """Time _async_update_data() and a full refresh for every coordinator, cycles times."""
+    coordinators = bench.coordinators
+    update_times = []
+    refresh_times = []
+    for _ in range(cycles):
+        for coordinator in coordinators:
+            began = time.perf_counter()
+            await coordinator._async_update_data()
+            update_times.append(time.perf_counter() - began)
+        for coordinator in coordinators:
+            began = time.perf_counter()
+            await coordinator.async_refresh()
+            refresh_times.append(time.perf_counter() - began)
+        await bench.hass.async_block_till_done()
+    return {
+        "update_us": _summary(update_times, 1e6),
+        "refresh_us": _summary(refresh_times, 1e6),
+        "pass_ms": statistics.fmean(refresh_times) * len(coordinators) * 1000,
+    }
+
+
+async def measure_latency(bench: Bench, timeout: float = 30) -> dict:
+    """Time from a humidity change to the plug command landing, all devices at once."""
+    hass = bench.hass
+    results = {}
+    for label, humidity, power, target in (
+        ("turn_on_ms", const.DEFAULT_HUMIDITY_ON + 5, RUNNING_POWER, "on"),
+        ("turn_off_ms", const.DEFAULT_HUMIDITY_OFF - 5, 0, "off"),
+    ):
+        # Let every coordinator's event cooldown run out first
+        await asyncio.sleep(const.EVENT_DEBOUNCE_COOLDOWN * 2)
+        await hass.async_block_till_done()
+        started = {}
+        landed = {}
+        done = asyncio.Event()
+
+        @core.callback
+        def _async_state_changed(event: core.Event, target=target):
+            entity_id = event.data["entity_id"]
+            new_state = event.data["new_state"]
+            if entity_id in started and entity_id not in landed and new_state and new_state.state == target:
+                landed[entity_id] = hass.loop.time() - started[entity_id]
+                if len(landed) == len(started):
+                    done.set()
+
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _async_state_changed)
+        for entry in bench.entries:
+            started[f"switch.{entry.title}_plug"] = hass.loop.time()
+            hass.states.async_set(f"sensor.{entry.title}_humidity", str(humidity))
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+        except TimeoutError:
+            pass
+        unsub()
+        for entry in bench.entries:
+            hass.states.async_set(f"sensor.{entry.title}_power", str(power))
+        results[label] = _summary(list(landed.values()), 1000)
+        results[label]["missed"] = len(started) - len(landed)
+    return results
+
+
+class VirtualClock:
+    """Replaces dt_util.utcnow/now so the integration sees simulated time."""
+
+    def __init__(self, start: float):
+        self.now = start
+        self._saved = None
+
+    def __enter__(self):
+        self._saved = (dt_util.utcnow, dt_util.now)
+        dt_util.utcnow = lambda: dt_util.utc_from_timestamp(self.now)
+        dt_util.now = lambda time_zone=None: dt_util.utc_from_timestamp(self.now).astimezone(
+            time_zone or dt_util.DEFAULT_TIME_ZONE
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        dt_util.utcnow, dt_util.now = self._saved
+
+
+def _store_writes(bench: Bench) -> int:
+    """Store files written: each standalone entry's own, plus the shared fleet file."""
+    writes = sum(coordinator.metrics.store_writes for coordinator in bench.coordinators)
+    fleet = bench.hass.data.get(const.DOMAIN, {}).get(const.DATA_FLEET)
+    return writes + (fleet.store_writes if fleet else 0)
+
+
+async def measure_store_writes(bench: Bench, hours: float, step: float, seed: int) -> dict:
+    """Simulate hours of sensor updates and count the store files written."""
+    hass = bench.hass
+    coordinators = bench.coordinators
+    rng = random.Random(seed)
+    humidity = [rng.uniform(const.DEFAULT_HUMIDITY_OFF - 2, const.DEFAULT_HUMIDITY_ON + 2) for _ in bench.entries]
+    writes_before = _store_writes(bench)
+    steps = int(hours * 3600 / step)
+
+    with VirtualClock(time.time()) as clock:
+        for _ in range(steps):
+            clock.now += step
+            context = core.Context()
+            for index, entry in enumerate(bench.entries):
+                running = hass.states.get(f"switch.{entry.title}_plug").state == "on"
+                # Drying lowers humidity by about 2 points per 10 minutes, it creeps back up when off
+                drift = -0.035 if running else 0.02
+                humidity[index] += drift * step / 10 + rng.gauss(0, 0.05)
+                power = RUNNING_POWER + rng.gauss(0, 3) if running else 0.0
+                hass.states.async_set(f"sensor.{entry.title}_humidity", f"{humidity[index]:.1f}", context=context)
+                hass.states.async_set(f"sensor.{entry.title}_power", f"{power:.1f}", context=context)
+            for coordinator in coordinators:
+                await coordinator.async_refresh()
+            await hass.async_block_till_done()
+            # The step is longer than the write delay, so every queued write would have happened by now
+            hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+            await hass.async_block_till_done()
+
+    writes = _store_writes(bench) - writes_before
+    return {
+        "store_writes_per_hour": writes / hours,
+        "store_writes_per_device_hour": writes / hours / len(coordinators),
+    }
+
+
+async def measure_memory(config_dir: Path, size: int, options: dict) -> dict:
+    """Heap allocated while setting up size entries, in a fresh instance."""
+    bench = Bench(config_dir, size, options)
+    await bench.async_start()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await bench.async_add_entries()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    await bench.async_stop()
+    return {"memory_kib_per_device": (after - before) / size / 1024}
+
+
+async def run(config_dir: Path, size: int, args) -> dict:
+    options = {const.CONF_EVENT_DRIVEN: args.event_driven, const.CONF_FLEET_MODE: args.fleet}
+    result = {"entries": size}
+
+    bench = Bench(config_dir, size, options)
+    await bench.async_start()
+    began = time.perf_counter()
+    await bench.async_add_entries()
+    result["startup_s"] = time.perf_counter() - began
+    result["setup_entry_ms"] = _summary(bench.setup_times, 1000)
+    result.update(await measure_updates(bench, args.cycles))
+    if args.event_driven:
+        result.update(await measure_latency(bench))
+    result.update(await measure_store_writes(bench, args.hours, args.step, args.seed))
+    await bench.async_stop()
+
+    if not args.skip_memory:
+        result.update(await measure_memory(config_dir, size, options))
+    return result
+
+
+# Output
+
+ROWS = (
+    ("startup_s", None, "startup (s)"),
+    ("setup_entry_ms", "mean", "setup per entry, mean (ms)"),
+    ("setup_entry_ms", "max", "setup per entry, max (ms)"),
+    ("update_us", "p50", "_async_update_data p50 (us)"),
+    ("update_us", "p95", "_async_update_data p95 (us)"),
+    ("refresh_us", "p50", "refresh p50 (us)"),
+    ("refresh_us", "p95", "refresh p95 (us)"),
+    ("pass_ms", None, "refresh all devices (ms)"),
+    ("turn_on_ms", "p50", "event to turn_on p50 (ms)"),
+    ("turn_on_ms", "p95", "event to turn_on p95 (ms)"),
+    ("turn_off_ms", "p95", "event to turn_off p95 (ms)"),
+    ("store_writes_per_hour", None, "store writes per hour"),
+    ("store_writes_per_device_hour", None, "store writes per device-hour"),
+    ("memory_kib_per_device", None, "memory per device (KiB)"),
+)
+
+
+def print_table(results: list[dict]):
+    label_width = max(len(label) for _, _, label in ROWS)
+    print(f"{'entries':<{label_width}}" + "".join(f"{result['entries']:>12}" for result in results))
+    for key, field, label in ROWS:
+        values = [result.get(key) for result in results]
+        values = [value.get(field) if isinstance(value, dict) else value for value in values]
+        if all(value is None for value in values):
+            continue
+        print(f"{label:<{label_width}}" + "".join(f"{value:>12.2f}" if value is not None else f"{'-':>12}" for value in values))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", default="1,50,500", help="Numbers of config entries, comma separated")
+    parser.add_argument("--cycles", type=int, default=20, help="Timed update cycles per device (default: 20)")
+    parser.add_argument("--event-driven", action="store_true", help="Set entries up in event-driven mode")
+    parser.add_argument("--fleet", action="store_true", help="Set entries up in fleet mode")
+    parser.add_argument("--hours", type=float, default=1, help="Simulated hours for the store write count")
+    parser.add_argument("--step", type=float, default=30, help="Simulated seconds between sensor updates (default: 30)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the simulated humidity")
+    parser.add_argument("--skip-memory", action="store_true", help="Skip the memory pass")
+    parser.add_argument("--json", help="Also write the raw results here")
+    args = parser.parse_args(argv)
+    if args.step < const.STORE_SAVE_DELAY:
+        parser.error(f"--step must be at least the store write delay ({const.STORE_SAVE_DELAY}s)")
+
+    logging.basicConfig(level=logging.ERROR)
+    # One config directory for the whole run: Python caches the custom_components package path
+    config_dir = Path(tempfile.mkdtemp(prefix="dehumidifier_bench_"))
+    (config_dir / "custom_components").mkdir()
+    (config_dir / "custom_components" / const.DOMAIN).symlink_to(COMPONENT_DIR)
+    results = []
+    try:
+        for size in (int(value) for value in args.entries.split(",")):
+            print(f"Benchmarking {size} entries...", file=sys.stderr)
+            results.append(asyncio.run(run(config_dir, size, args)))
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""Replay recorded history through the dehumidifier control logic and sweep settings.
+
+Takes exported history for a plug switch, its power sensor and a humidity sensor
+(Home Assistant history CSV, or history JSON from the REST/websocket API) and
+evaluates every combination of the given thresholds and schedule windows over it.
+Schedules are evaluated with the integration's own schedule module: the
+--start/--end windows as the start and end time options (end inclusive), or
+--schedule with rules in the format of the schedule option.
+
+The sweep is vectorised with NumPy: time advances step by step, and each step
+updates all parameter combinations at once with the same rules as
+engine.evaluate(). Use --verify to cross-check a sample of combinations against
+the scalar engine used by the integration itself.
+
+Humidity is replayed as recorded (open loop): the simulation does not model how
+running the unit would have lowered it. "above_target_h" therefore counts the
+time humidity was above the start threshold while the simulated unit was off.
+
+Minimum on and off times (--min-on, --min-off) are replayed. Holding a start
+because humidity is already falling (the trend hold) is not: it depends on the
+fitted trend, which the coordinator restarts at every switch. Full detection
+uses single power readings, as with the "sample" power statistic; median and
+EWMA smoothing are not modelled.
+
+Example:
+    python scripts/replay.py history.csv \\
+        --switch switch.cellar_plug --power sensor.cellar_power --humidity sensor.cellar_humidity \\
+        --on 55:70:1 --off 45:60:1 --full 2,5 --start 07:00,09:00 --end 20:00,22:00 --top 20
+    python scripts/replay.py history.csv ... --schedule "mon-fri 07:00-09:00, 17:00-22:30; sat,sun 09:00-23:00"
+"""
+
+import argparse
+import csv
+import importlib.util
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, time as dt_time, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+COMPONENT_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "dehumidifier_plug"
+
+METRICS = ("runtime_h", "cycles", "above_target_h", "full_events")
+
+
+def _load_module(name: str):
+    """Load a dependency-free module of the integration without importing Home Assistant."""
+    spec = importlib.util.spec_from_file_location(f"dehumidifier_plug_{name}", COMPONENT_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+engine = _load_module("engine")
+const = _load_module("const")
+schedule = _load_module("schedule")
+
+
+# History loading
+
+def _parse_timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def load_history(path: str) -> dict[str, list[tuple[float, str]]]:
+    """Return {entity_id: [(timestamp, state), ...]} sorted by time."""
+    history: dict[str, list[tuple[float, str]]] = {}
+    text = Path(path).read_text()
+    if path.endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            # Compressed websocket format: {entity_id: [{"s": state, "lu": ts, "lc": ts}, ...]}
+            for entity_id, states in data.items():
+                for item in states:
+                    history.setdefault(entity_id, []).append(
+                        (_parse_timestamp(item.get("lc", item.get("lu"))), item["s"])
+                    )
+        else:
+            # REST format: [[{"entity_id": ..., "state": ..., "last_changed": ...}, ...], ...]
+            for series in data:
+                for item in series:
+                    history.setdefault(item["entity_id"], []).append(
+                        (_parse_timestamp(item["last_changed"]), item["state"])
+                    )
+    else:
+        # History panel download: entity_id,state,last_changed
+        for row in csv.DictReader(text.splitlines()):
+            history.setdefault(row["entity_id"], []).append(
+                (_parse_timestamp(row["last_changed"]), row["state"])
+            )
+    for series in history.values():
+        series.sort()
+    return history
+
+
+def _to_float(state: str) -> float:
+    try:
+        return float(state)
+    except ValueError:
+        return math.nan
+
+
+def sample(series: list[tuple[float, str]], ticks: np.ndarray, convert) -> np.ndarray:
+    """Value of a state series at each tick (last change at or before it)."""
+    times = np.array([t for t, _ in series])
+    values = np.array([convert(s) for _, s in series] + [convert("unknown")])
+    index = np.searchsorted(times, ticks, side="right") - 1
+    # index -1 (before the first sample) picks the trailing "unknown" entry
+    return values[index]
+
+
+class Timeline:
+    """Inputs resampled onto a fixed step."""
+
+    def __init__(self, history, switch_id, power_id, humidity_id, step, tz, nominal_power=None):
+        for entity_id in (switch_id, power_id, humidity_id):
+            if entity_id not in history:
+                raise SystemExit(f"{entity_id} not found in history")
+        start = max(history[e][0][0] for e in (switch_id, power_id, humidity_id))
+        end = max(history[e][-1][0] for e in (switch_id, power_id, humidity_id))
+        self.step = step
+        self.ticks = np.arange(start, end, step)
+        recorded_on = sample(history[switch_id], self.ticks, lambda s: s == "on")
+        recorded_power = sample(history[power_id], self.ticks, _to_float)
+        self.humidity = sample(history[humidity_id], self.ticks, _to_float)
+        self.valid = ~np.isnan(recorded_power) & ~np.isnan(self.humidity)
+
+        # Power the plug would have reported had the simulated unit been on: the recorded
+        # reading while the real unit was on, otherwise its typical running draw.
+        if nominal_power is None:
+            running = recorded_power[recorded_on & self.valid]
+            nominal_power = float(np.median(running)) if running.size else 100.0
+        self.nominal_power = nominal_power
+        self.power_if_on = np.where(recorded_on & ~np.isnan(recorded_power), recorded_power, nominal_power)
+
+        # Wall-clock time of every step, as the coordinator passes it to the schedule
+        self.local = [datetime.fromtimestamp(t, tz) for t in self.ticks]
+
+
+# Parameter grid
+
+def _parse_range(spec: str) -> list[float]:
+    """Parse "first:last:step" ranges (inclusive) and plain values, comma separated."""
+    values = []
+    for part in spec.split(","):
+        if part.count(":") == 2:
+            first, last, step = (float(x) for x in part.split(":"))
+            values.extend(np.round(np.arange(first, last + step / 2, step), 6).tolist())
+        else:
+            values.append(float(part))
+    return values
+
+
+def _parse_time(value: str) -> dt_time:
+    return dt_time.fromisoformat(value.strip())
+
+
+def daily_schedules(starts: list[dt_time], ends: list[dt_time]) -> list[tuple[tuple[str, ...], "schedule.Schedule"]]:
+    """Every start/end window, labelled by its start and end time."""
+    return [((str(start), str(end)), schedule.Schedule.daily(start, end)) for start, end in itertools.product(starts, ends)]
+
+
+class Grid:
+    """All parameter combinations as parallel arrays (one element per combination).
+
+    schedules holds (label, Schedule) pairs; each combination refers to one by
+    its index in window.
+    """
+
+    def __init__(self, on, off, full, schedules):
+        combos = [c for c in itertools.product(on, off, full, range(len(schedules))) if c[1] < c[0]]
+        if not combos:
+            raise SystemExit("No valid combinations (the off threshold must be below the on threshold)")
+        columns = np.array(combos, dtype=float).T
+        self.on, self.off, self.full = columns[:3]
+        self.window = columns[3].astype(int)
+        self.schedules = schedules
+        self.size = len(combos)
+
+
+# Simulation
+
+def _schedule_table(timeline: Timeline, grid: Grid) -> tuple[np.ndarray, np.ndarray]:
+    """Inside-schedule flags per step for each schedule, and each combination's schedule."""
+    table = np.array(
+        [[rules.is_active(local) for _, rules in grid.schedules] for local in timeline.local], dtype=bool
+    ).reshape(timeline.ticks.size, len(grid.schedules))
+    return table, grid.window
+
+
+def _input_changes(timeline: Timeline, schedule_table: np.ndarray) -> np.ndarray:
+    """Steps at which anything an evaluation reads differs from the previous step."""
+    changed = np.ones(timeline.ticks.size, dtype=bool)
+    differs = schedule_table[1:] != schedule_table[:-1]
+    differs = differs.any(axis=1) | (timeline.valid[1:] != timeline.valid[:-1])
+    for series in (timeline.humidity, timeline.power_if_on):
+        previous, current = series[:-1], series[1:]
+        differs |= (previous != current) & ~(np.isnan(previous) & np.isnan(current))
+    changed[1:] = differs
+    return changed
+
+
+def sweep(timeline: Timeline, grid: Grid, full_delay: float, min_on: float = 0, min_off: float = 0) -> dict[str, np.ndarray]:
+    """Evaluate every combination over the timeline; returns one metric array per name.
+
+    Steps where no input changed and no combination has an action or a full-tank
+    timer or minimum on/off time pending cannot change anything, so they are
+    only accounted, in bulk.
+    """
+    k = grid.size
+    is_on = np.zeros(k, dtype=bool)
+    low_since = np.full(k, np.nan)
+    latched = np.zeros(k, dtype=bool)
+    # The engine sees a switch (and starts its dwell) at the first evaluation after a command
+    switched_at = np.full(k, np.nan)
+    switching = np.zeros(k, dtype=bool)
+    runtime = np.zeros(k)
+    above = np.zeros(k)
+    cycles = np.zeros(k, dtype=np.int64)
+    full_events = np.zeros(k, dtype=np.int64)
+    schedule_table, window_index = _schedule_table(timeline, grid)
+    changed = _input_changes(timeline, schedule_table)
+    step = timeline.step
+
+    settled = False
+    span = 0  # steps covered by the current on/off state since the last evaluation
+    above_target = np.zeros(k, dtype=bool)
+    for i, now in enumerate(timeline.ticks):
+        if settled and not changed[i]:
+            span += 1
+            continue
+        runtime += is_on * (step * span)
+        above += (above_target & ~is_on) * (step * span)
+        span = 1
+
+        humidity = timeline.humidity[i]
+        above_target = humidity > grid.on
+        if not timeline.valid[i]:
+            settled = True
+            continue
+
+        inside = schedule_table[i][window_index]
+        switched_at = np.where(switching, now, switched_at)
+        switching[:] = False
+        since_switch = now - switched_at  # NaN before the first switch compares False
+        holding_on = since_switch < min_on
+        holding_off = since_switch < min_off
+        power_low = is_on & (timeline.power_if_on[i] < grid.full)
+        low_since = np.where(power_low, np.where(np.isnan(low_since), now, low_since), np.nan)
+        was_latched = latched
+        latched = power_low & (was_latched | (now - low_since >= full_delay))
+        full_events += latched & ~was_latched
+
+        humidity_low = humidity < grid.off
+        wants_on = inside & above_target & ~latched & ~is_on
+        turn_on = wants_on & ~holding_off
+        turn_off = is_on & np.where(inside, humidity_low & ~holding_on, humidity_low | ~latched)
+        held = (wants_on & holding_off) | (is_on & inside & humidity_low & holding_on)
+        cycles += turn_on
+        is_on = (is_on | turn_on) & ~turn_off
+        switching = turn_on | turn_off
+        settled = not (switching.any() or held.any() or (power_low & ~latched).any())
+
+    runtime += is_on * (step * span)
+    above += (above_target & ~is_on) * (step * span)
+    return {
+        "runtime_h": runtime / 3600,
+        "cycles": cycles,
+        "above_target_h": above / 3600,
+        "full_events": full_events,
+    }
+
+
+def replay_scalar(timeline: Timeline, on, off, full, rules, full_delay, min_on=0, min_off=0) -> dict[str, float]:
+    """Replay one combination through engine.evaluate(), as the coordinator would without a humidity trend."""
+    config = engine.EngineConfig(
+        humidity_on=on,
+        humidity_off=off,
+        full_power_threshold=full,
+        full_delay=full_delay,
+        min_on_time=min_on,
+        min_off_time=min_off,
+    )
+    state = engine.EngineState()
+    switch_state = engine.STATE_OFF
+    metrics = dict.fromkeys(METRICS, 0.0)
+    for i, now in enumerate(timeline.ticks):
+        humidity = float(timeline.humidity[i])
+        if timeline.valid[i]:
+            power = float(timeline.power_if_on[i]) if switch_state == engine.STATE_ON else 0.0
+            inputs = engine.EngineInput(
+                now=float(now),
+                switch_state=switch_state,
+                power=power,
+                humidity=humidity,
+                auto_enabled=True,
+                inside_schedule=rules.is_active(timeline.local[i]),
+            )
+            was_latched = state.is_full_latched
+            decision = engine.evaluate(config, inputs, state)
+            state = decision.state
+            metrics["full_events"] += state.is_full_latched and not was_latched
+            for action in decision.actions:
+                metrics["cycles"] += action == engine.ACTION_TURN_ON
+                # The plug follows the command before the next evaluation reads it back
+                switch_state = engine.STATE_ON if action == engine.ACTION_TURN_ON else engine.STATE_OFF
+        running = switch_state == engine.STATE_ON
+        metrics["runtime_h"] += running * timeline.step / 3600
+        metrics["above_target_h"] += (humidity > on and not running) * timeline.step / 3600
+    return metrics
+
+
+def verify(timeline: Timeline, grid: Grid, results, full_delay: float, count: int, min_on: float = 0, min_off: float = 0) -> None:
+    for index in random.sample(range(grid.size), min(count, grid.size)):
+        expected = replay_scalar(
+            timeline, grid.on[index], grid.off[index], grid.full[index],
+            grid.schedules[grid.window[index]][1], full_delay, min_on, min_off,
+        )
+        for name in METRICS:
+            if not math.isclose(expected[name], float(results[name][index]), rel_tol=1e-9, abs_tol=1e-9):
+                raise SystemExit(
+                    f"Mismatch for combination {index} on {name}: scalar {expected[name]} vs vectorised {results[name][index]}"
+                )
+    print(f"verified {min(count, grid.size)} combinations against the scalar engine", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("history", help="History export (.csv or .json)")
+    parser.add_argument("--switch", required=True, help="Plug switch entity_id")
+    parser.add_argument("--power", required=True, help="Power sensor entity_id")
+    parser.add_argument("--humidity", required=True, help="Humidity sensor entity_id")
+    parser.add_argument("--on", default=str(const.DEFAULT_HUMIDITY_ON), help="Start thresholds, e.g. 55:70:1 or 58,60,62")
+    parser.add_argument("--off", default=str(const.DEFAULT_HUMIDITY_OFF), help="Stop thresholds")
+    parser.add_argument("--full", default=str(const.DEFAULT_FULL_THRESHOLD), help="Full power thresholds (W)")
+    parser.add_argument("--start", help=f"Schedule start times, comma separated (default: {const.DEFAULT_START_TIME})")
+    parser.add_argument("--end", help=f"Schedule end times, comma separated (default: {const.DEFAULT_END_TIME})")
+    parser.add_argument("--schedule", help="Schedule rules, as in the schedule option, instead of --start/--end")
+    parser.add_argument("--full-delay", type=float, default=const.DEFAULT_FULL_DWELL, help="Seconds of low power before full")
+    parser.add_argument("--min-on", type=float, default=const.DEFAULT_MIN_ON_TIME, help="Minimum on time in seconds")
+    parser.add_argument("--min-off", type=float, default=const.DEFAULT_MIN_OFF_TIME, help="Minimum off time in seconds")
+    parser.add_argument("--step", type=float, default=30, help="Evaluation interval in seconds (default: 30)")
+    parser.add_argument("--nominal-power", type=float, help="Running draw to assume when the real unit was off")
+    parser.add_argument("--tz", help="Time zone for the schedule (default: system local time)")
+    parser.add_argument("--sort", default="runtime_h", choices=METRICS, help="Metric to sort by (ascending)")
+    parser.add_argument("--top", type=int, help="Only print the best N combinations")
+    parser.add_argument("--verify", type=int, default=0, metavar="N", help="Cross-check N random combinations")
+    parser.add_argument("--output", help="Write CSV here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.schedule is not None:
+        if args.start or args.end:
+            parser.error("--schedule replaces --start/--end; give one or the other")
+        try:
+            schedules = [((args.schedule,), schedule.Schedule.parse(args.schedule))]
+        except ValueError as e:
+            parser.error(f"invalid --schedule: {e}")
+        label_columns = ["schedule"]
+    else:
+        try:
+            schedules = daily_schedules(
+                [_parse_time(t) for t in (args.start or const.DEFAULT_START_TIME).split(",")],
+                [_parse_time(t) for t in (args.end or const.DEFAULT_END_TIME).split(",")],
+            )
+        except ValueError as e:
+            parser.error(f"invalid --start/--end: {e}")
+        label_columns = ["start_time", "end_time"]
+
+    tz = ZoneInfo(args.tz) if args.tz else datetime.now(timezone.utc).astimezone().tzinfo
+    history = load_history(args.history)
+    timeline = Timeline(history, args.switch, args.power, args.humidity, args.step, tz, args.nominal_power)
+    grid = Grid(
+        _parse_range(args.on),
+        _parse_range(args.off),
+        _parse_range(args.full),
+        schedules,
+    )
+
+    began = time.perf_counter()
+    results = sweep(timeline, grid, args.full_delay, args.min_on, args.min_off)
+    print(
+        f"{grid.size} combinations x {timeline.ticks.size} steps in {time.perf_counter() - began:.2f}s",
+        file=sys.stderr,
+    )
+    if args.verify:
+        verify(timeline, grid, results, args.full_delay, args.verify, args.min_on, args.min_off)
+
+    order = np.argsort(results[args.sort], kind="stable")
+    if args.top:
+        order = order[: args.top]
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(["humidity_on_threshold", "humidity_off_threshold", "full_power_threshold", *label_columns, *METRICS])
+    for index in order:
+        writer.writerow([
+            grid.on[index], grid.off[index], grid.full[index],
+            *grid.schedules[grid.window[index]][0],
+            *(round(float(results[name][index]), 3) for name in METRICS),
+        ])
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()